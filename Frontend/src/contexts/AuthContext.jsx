@@ -1,4 +1,5 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
+import { AUTH_EXPIRED_EVENT } from '../lib/api';
 
 const AuthContext = createContext();
 
@@ -18,21 +19,30 @@ export const AuthProvider = ({ children }) => {
   useEffect(() => {
     const storedUser = localStorage.getItem('user');
     
-    if (storedUser) {
+    if (storedUser && localStorage.getItem('token')) {
       setUser(JSON.parse(storedUser));
     }
     setLoading(false);
   }, []);
 
-  const login = (userData) => {
-    // Backend now returns user object directly
-    setUser(userData);
-    localStorage.setItem('user', JSON.stringify(userData));
+  // api.js clears the stored session when the server rejects the token
+  useEffect(() => {
+    const handleExpired = () => setUser(null);
+    window.addEventListener(AUTH_EXPIRED_EVENT, handleExpired);
+    return () => window.removeEventListener(AUTH_EXPIRED_EVENT, handleExpired);
+  }, []);
+
+  const login = (authData) => {
+    // /login returns a bearer token alongside the user object
+    setUser(authData.user);
+    localStorage.setItem('user', JSON.stringify(authData.user));
+    localStorage.setItem('token', authData.access_token);
   };
 
   const logout = () => {
     setUser(null);
     localStorage.removeItem('user');
+    localStorage.removeItem('token');
   };
 
   const isAuthenticated = () => {
@@ -2,13 +2,29 @@ const BASE_URL = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000'
 
 // Helper function to get auth headers
 const getAuthHeaders = () => {
+	const token = localStorage.getItem('token');
 	return {
-		'Content-Type': 'application/json'
+		'Content-Type': 'application/json',
+		...(token ? { Authorization: `Bearer ${token}` } : {})
 	};
 };
 
+// Tokens expire; on a 401 for an authenticated call drop the stored
+// session so AuthContext sends the user back to the login page
+export const AUTH_EXPIRED_EVENT = 'auth:expired';
+
+const expireSession = () => {
+	localStorage.removeItem('user');
+	localStorage.removeItem('token');
+	window.dispatchEvent(new Event(AUTH_EXPIRED_EVENT));
+};
+
 // Helper function to handle API responses
-const handleResponse = async (response) => {
+const handleResponse = async (response, authenticated = false) => {
+	if (authenticated && response.status === 401) {
+		expireSession();
+		throw new Error('Your session has expired, please log in again');
+	}
 	if (!response.ok) {
 		const error = await response.json().catch(() => ({ detail: 'Network error' }));
 		throw new Error(error.detail || `HTTP ${response.status}`);
@@ -35,8 +51,7 @@ export async function login(credentials) {
 	return handleResponse(res);
 }
 
-// getCurrentUser is no longer needed since we don't use JWT tokens
-// User data is returned directly from login endpoint
+// The login response carries the user object and a bearer token
 
 // Carbon tracking APIs
 export async function compute(payload) {
@@ -51,15 +66,63 @@ export async function compute(payload) {
 export async function createLog(userId, payload) {
 	const res = await fetch(`${BASE_URL}/logs/${userId}`, {
 		method: 'POST',
-		headers: { 'Content-Type': 'application/json' },
+		headers: getAuthHeaders(),
 		body: JSON.stringify(payload)
 	});
-	return handleResponse(res);
+	return handleResponse(res, true);
 }
 
 export async function listLogs(userId) {
 	const res = await fetch(`${BASE_URL}/logs/${userId}`, {
-		headers: { 'Content-Type': 'application/json' }
+		headers: getAuthHeaders()
 	});
-	return handleResponse(res);
+	return handleResponse(res, true);
+}
+
+// Live updates from /logs/{userId}/events (server-sent events). Uses fetch
+// rather than EventSource so the bearer token can be sent as a header.
+// handlers maps event names (snapshot, log, resync) to callbacks; returns
+// a function that closes the stream.
+export function subscribeToLogs(userId, handlers) {
+	const controller = new AbortController();
+
+	const connect = async () => {
+		const res = await fetch(`${BASE_URL}/logs/${userId}/events`, {
+			headers: getAuthHeaders(),
+			signal: controller.signal
+		});
+		if (res.status === 401) {
+			expireSession();
+			return false;
+		}
+		if (!res.ok || !res.body) return false;
+		const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+		let buffer = '';
+		for (;;) {
+			const { value, done } = await reader.read();
+			if (done) return true;
+			buffer += value;
+			let end;
+			while ((end = buffer.indexOf('\n\n')) !== -1) {
+				const frame = buffer.slice(0, end);
+				buffer = buffer.slice(end + 2);
+				let event = 'message';
+				let data = '';
+				for (const line of frame.split('\n')) {
+					if (line.startsWith('event: ')) event = line.slice(7);
+					else if (line.startsWith('data: ')) data += line.slice(6);
+				}
+				if (data && handlers[event]) handlers[event](JSON.parse(data));
+			}
+		}
+	};
+
+	(async () => {
+		// The server ends the stream after a resync when this client fell behind; reconnect
+		while (!controller.signal.aborted && await connect().catch(() => !controller.signal.aborted)) {
+			await new Promise(resolve => setTimeout(resolve, 1000));
+		}
+	})();
+
+	return () => controller.abort();
 }
@@ -1,5 +1,5 @@
 import { useEffect, useMemo, useState } from 'react'
-import { listLogs } from '../lib/api'
+import { listLogs, subscribeToLogs } from '../lib/api'
 import { useAuth } from '../contexts/AuthContext'
 import { LineChart, Line, XAxis, YAxis, Tooltip, ResponsiveContainer, PieChart, Pie, Cell } from 'recharts'
 
@@ -76,6 +76,17 @@ export default function Dashboard() {
 			.catch(() => setLogs([]))
 			.finally(() => setLoading(false))
 	}, [user])
+
+	useEffect(() => {
+		if (!user) return
+
+		// New logs are pushed as they are saved instead of reloading the whole history
+		const reload = () => listLogs(user.id).then(data => setLogs(data.items || [])).catch(() => {})
+		return subscribeToLogs(user.id, {
+			log: ({ entry }) => setLogs(prev => [...prev, entry]),
+			resync: reload,
+		})
+	}, [user])
 	
 	const latest = logs[logs.length - 1]
 	const eco = useMemo(() => latest ? Math.max(0, Math.min(100, Math.round(100 - (latest.totalKg / 10) * 100))) : 0, [latest])
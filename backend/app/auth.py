@@ -0,0 +1,89 @@
+import asyncio
+import hmac
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import Depends, Header, HTTPException, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from .cache import TTLCache
+from .logic import decode_token, get_pwd_context
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# bcrypt is deliberately slow (~50-250 ms per call) and releases the GIL, so
+# it runs on a small dedicated pool instead of the event loop; a login burst
+# then queues here without stalling other requests.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+# Decoded claims per token, so repeat requests skip the HMAC check
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+_claims_cache = TTLCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")), ttl=TOKEN_CACHE_TTL)
+
+# Compared against when the email is unknown, so both paths cost one bcrypt verify
+_DUMMY_HASH = "$2b$12$C6UzMDM.H6dfI/f/IKxGhu3Rr0Ru7zSW3dC0QoKGVXk9hF/FlkA4C"
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+def _check_password(plain: str, stored: Optional[str]) -> Tuple[bool, Optional[str]]:
+	"""Verify a password; also returns a replacement hash when the stored one should be upgraded."""
+	pwd_context = get_pwd_context()
+	if stored is None:
+		pwd_context.verify(plain, _DUMMY_HASH)
+		return False, None
+	if pwd_context.identify(stored) is None:
+		# Accounts created before passwords were hashed store them in plain text
+		ok = hmac.compare_digest(plain.encode(), stored.encode())
+		return ok, pwd_context.hash(plain) if ok else None
+	return pwd_context.verify_and_update(plain, stored)
+
+async def hash_password(password: str) -> str:
+	return await asyncio.get_running_loop().run_in_executor(_hash_pool, get_pwd_context().hash, password)
+
+async def check_password(plain: str, stored: Optional[str]) -> Tuple[bool, Optional[str]]:
+	return await asyncio.get_running_loop().run_in_executor(_hash_pool, _check_password, plain, stored)
+
+def token_claims(token: str) -> dict:
+	claims = _claims_cache.get(token)
+	if claims is not None:
+		return claims
+	claims = decode_token(token)
+	# Never cache a token past its own expiry
+	ttl = min(TOKEN_CACHE_TTL, claims.get("exp", 0) - time.time())
+	if ttl > 0:
+		_claims_cache.set(token, claims, ttl=ttl)
+	return claims
+
+async def get_current_user_id(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> int:
+	if credentials is None or credentials.scheme.lower() != "bearer":
+		raise HTTPException(
+			status_code=status.HTTP_401_UNAUTHORIZED,
+			detail="Not authenticated",
+			headers={"WWW-Authenticate": "Bearer"},
+		)
+	claims = token_claims(credentials.credentials)
+	if "uid" not in claims:
+		raise HTTPException(
+			status_code=status.HTTP_401_UNAUTHORIZED,
+			detail="Could not validate credentials",
+			headers={"WWW-Authenticate": "Bearer"},
+		)
+	return claims["uid"]
+
+async def authorize_user(user_id: int, current_user_id: int = Depends(get_current_user_id)) -> int:
+	"""Only let a user read and write their own logs."""
+	if user_id != current_user_id:
+		raise HTTPException(
+			status_code=status.HTTP_403_FORBIDDEN,
+			detail="Not allowed to access this user's data"
+		)
+	return user_id
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+	# Admin endpoints stay disabled unless ADMIN_TOKEN is configured
+	if not ADMIN_TOKEN or not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+		raise HTTPException(
+			status_code=status.HTTP_403_FORBIDDEN,
+			detail="Admin token required"
+		)
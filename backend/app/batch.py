@@ -0,0 +1,105 @@
+from typing import List, Sequence
+import numpy as np
+from .logic import (
+	EMISSION_FACTORS,
+	TIP_SHORT_TRIPS, TIP_PUBLIC_TRANSPORT, TIP_ELECTRICITY, TIP_DIET, TIP_WEEKLY_GOAL,
+)
+from .schemas import ComputeRequest
+
+# Bit order used to encode which tips apply to a row; must follow generate_tips.
+_TIP_FLAGS = (
+	(TIP_SHORT_TRIPS, TIP_PUBLIC_TRANSPORT),
+	(TIP_ELECTRICITY,),
+	(TIP_DIET,),
+	(TIP_WEEKLY_GOAL,),
+)
+
+def round2(values: np.ndarray) -> np.ndarray:
+	"""Vectorized equivalent of the builtin round(x, 2), bit-for-bit."""
+	scaled = values * 100.0
+	rounded = np.rint(scaled)
+	# The scaled product is itself rounded, so rint can only disagree with
+	# round() when it lands exactly on a .5 tie (e.g. 1.005). The exact
+	# product's error term (Dekker's two-product; 100 needs no split) tells
+	# which side of the tie the true value was on.
+	tie = np.flatnonzero(np.abs(scaled - np.trunc(scaled)) == 0.5)
+	if tie.size:
+		x, p = values[tie], scaled[tie]
+		c = 134217729.0 * x
+		hi = c - (c - x)
+		error = (hi * 100.0 - p) + (x - hi) * 100.0
+		rounded[tie] = np.where(error > 0, np.ceil(p), np.where(error < 0, np.floor(p), rounded[tie]))
+	rounded /= 100.0
+	# Past 2**52 / 100 ties are no longer representable; defer to round()
+	big = np.flatnonzero(np.abs(values) >= 1e13)
+	if big.size:
+		rounded[big] = [round(v, 2) for v in values[big].tolist()]
+	return rounded
+
+def lookup_factors(keys: Sequence[str], table: dict, default: float) -> np.ndarray:
+	if not len(keys):
+		return np.zeros(0)
+	uniq, inverse = np.unique(np.asarray(keys, dtype=object), return_inverse=True)
+	values = np.array([table.get(k, default) for k in uniq.tolist()], dtype=float)
+	return values[inverse]
+
+def calculate_emissions_batch(travel_km: np.ndarray, travel_mode: Sequence[str], electricity_kwh: np.ndarray, diet: Sequence[str], factors: dict = EMISSION_FACTORS):
+	travel_table = factors["travelPerKmKg"]
+	food_table = factors["foodPerDayKg"]
+	travel_factor = lookup_factors(travel_mode, travel_table, travel_table["car"])
+	travel_kg = round2(travel_km * travel_factor)
+	electricity_kg = round2(electricity_kwh * factors["electricityPerKwhKg"])
+	food_kg = lookup_factors(diet, food_table, food_table["mixed"])
+	total_kg = round2(travel_kg + electricity_kg + food_kg)
+	return travel_kg, electricity_kg, food_kg, total_kg
+
+def compute_eco_score_batch(total_kg: np.ndarray) -> np.ndarray:
+	target = 10.0
+	score = 100 - (total_kg / target) * 100
+	return np.clip(np.rint(score), 0, 100).astype(int)
+
+def generate_tips_batch(travel_km, travel_mode, electricity_kwh, diet, total_kg) -> List[List[str]]:
+	mode = np.asarray(travel_mode, dtype=object)
+	diet = np.asarray(diet, dtype=object)
+	codes = (
+		((mode == 'car') & (travel_km > 0)).astype(np.int64)
+		| ((electricity_kwh > 0).astype(np.int64) << 1)
+		| (np.isin(diet, ('nonveg', 'mixed')).astype(np.int64) << 2)
+		| ((total_kg > 15).astype(np.int64) << 3)
+	)
+	by_code = {}
+	for code in np.unique(codes).tolist():
+		tips = []
+		for bit, flag_tips in enumerate(_TIP_FLAGS):
+			if code >> bit & 1:
+				tips.extend(flag_tips)
+		by_code[code] = tips
+	return [list(by_code[c]) for c in codes.tolist()]
+
+def compute_batch(items: List[ComputeRequest], factors: dict = EMISSION_FACTORS) -> List[dict]:
+	"""Batch version of POST /compute; results match the scalar path exactly."""
+	n = len(items)
+	travel_km = np.fromiter((i.travelKm for i in items), dtype=float, count=n)
+	electricity_kwh = np.fromiter((i.electricityKwh for i in items), dtype=float, count=n)
+	travel_mode = [i.travelMode for i in items]
+	diet = [i.diet for i in items]
+
+	travel_kg, electricity_kg, food_kg, total_kg = calculate_emissions_batch(
+		travel_km, travel_mode, electricity_kwh, diet, factors
+	)
+	eco = compute_eco_score_batch(total_kg)
+	tips = generate_tips_batch(travel_km, travel_mode, electricity_kwh, diet, total_kg)
+	return [
+		{
+			"travelKg": t,
+			"electricityKg": e,
+			"foodKg": f,
+			"totalKg": tot,
+			"ecoScore": s,
+			"tips": tp,
+		}
+		for t, e, f, tot, s, tp in zip(
+			travel_kg.tolist(), electricity_kg.tolist(), food_kg.tolist(),
+			total_kg.tolist(), eco.tolist(), tips,
+		)
+	]
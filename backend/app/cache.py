@@ -0,0 +1,59 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+	"""Thread-safe LRU cache bounded by size whose entries also expire after ttl seconds."""
+
+	def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key: Hashable, default: Any = None) -> Any:
+		with self._lock:
+			entry = self._data.get(key, _MISSING)
+			if entry is _MISSING:
+				return default
+			value, expires = entry
+			if expires <= time.monotonic():
+				del self._data[key]
+				return default
+			self._data.move_to_end(key)
+			return value
+
+	def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+		expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+		with self._lock:
+			self._data[key] = (value, expires)
+			self._data.move_to_end(key)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+
+	def pop(self, key: Hashable, default: Any = None) -> Any:
+		with self._lock:
+			entry = self._data.pop(key, _MISSING)
+		return default if entry is _MISSING else entry[0]
+
+	def clear(self) -> None:
+		with self._lock:
+			self._data.clear()
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+def _opaque(tag: str) -> str:
+	tag = tag.strip()
+	return tag[2:] if tag.startswith("W/") else tag
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+	if not if_none_match:
+		return False
+	if if_none_match.strip() == "*":
+		return True
+	# Weak comparison, as required for If-None-Match
+	return _opaque(etag) in {_opaque(tag) for tag in if_none_match.split(",")}
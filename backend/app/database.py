@@ -1,5 +1,7 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
@@ -19,18 +21,86 @@ if all([DB_HOST, DB_USER, DB_PASSWORD, DB_NAME]):
 else:
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./carbon.db')
 
+IS_SQLITE = DATABASE_URL.startswith('sqlite')
+
+# Production SQLite profile (the default for file databases): WAL so readers
+# never block the writer, relaxed fsync, a large page cache and mmap'd reads.
+# Set SQLITE_PROFILE=default to keep SQLite's stock settings.
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'production').lower()
+SQLITE_PRODUCTION = (
+	IS_SQLITE and SQLITE_PROFILE == 'production'
+	and DATABASE_URL not in ('sqlite://', 'sqlite:///:memory:')
+)
+SQLITE_PRAGMAS = (
+	"PRAGMA journal_mode=WAL",
+	"PRAGMA synchronous=NORMAL",
+	f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '10000'))}",
+	f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_SIZE_KB', '65536'))}",
+	f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}",
+	"PRAGMA temp_store=MEMORY",
+)
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+	cursor = dbapi_connection.cursor()
+	for pragma in SQLITE_PRAGMAS:
+		cursor.execute(pragma)
+	cursor.close()
+
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if DATABASE_URL.startswith('sqlite') else {},
     pool_pre_ping=True,  # Enables automatic reconnection for MySQL
     pool_recycle=300,    # Recycle connections every 5 minutes
 )
+if SQLITE_PRODUCTION:
+	event.listen(engine, "connect", _apply_sqlite_pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async drivers for the same database: aiomysql for MySQL, aiosqlite for SQLite
+ASYNC_DRIVERS = {
+	'mysql+pymysql': 'mysql+aiomysql',
+	'mysql': 'mysql+aiomysql',
+	'sqlite': 'sqlite+aiosqlite',
+	'postgresql': 'postgresql+asyncpg',
+}
+
+def to_async_url(url: str) -> str:
+	scheme, sep, rest = url.partition('://')
+	return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL', to_async_url(DATABASE_URL))
+
+# aiosqlite defaults to a connection per checkout (NullPool); the production
+# profile keeps a pool of reader connections so pragmas and caches persist
+async_pool_args = {} if ASYNC_DATABASE_URL.startswith('sqlite') else {
+    "pool_size": int(os.getenv('DB_POOL_SIZE', '10')),
+    "max_overflow": int(os.getenv('DB_MAX_OVERFLOW', '20')),
+}
+if SQLITE_PRODUCTION:
+	async_pool_args = {
+		"poolclass": AsyncAdaptedQueuePool,
+		"pool_size": int(os.getenv('DB_POOL_SIZE', '10')),
+		"max_overflow": int(os.getenv('DB_MAX_OVERFLOW', '20')),
+	}
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    **async_pool_args,
+)
+if SQLITE_PRODUCTION:
+	event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+# expire_on_commit=False so committed objects can be serialized without another round trip
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
 	db = SessionLocal()
 	try:
 		yield db
 	finally:
 		db.close()
+
+async def get_async_db():
+	async with AsyncSessionLocal() as db:
+		yield db
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+from .serialize import fast_json_bytes
+
+logger = logging.getLogger(__name__)
+
+# Frames a subscriber may fall behind by before it is cut off with a resync
+EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', '64'))
+# Seconds between keep-alive comments on an idle stream
+EVENT_KEEPALIVE = float(os.getenv('EVENT_KEEPALIVE', '15'))
+# Relays events between workers, e.g. redis://localhost:6379/0; unset keeps them in-process
+EVENT_BACKEND_URL = os.getenv('EVENT_BACKEND_URL', '')
+
+def sse_frame(event: str, data, event_id: Optional[int] = None) -> bytes:
+	"""One server-sent event; compact JSON never contains a raw newline."""
+	head = b"id: %d\n" % event_id if event_id is not None else b""
+	return head + b"event: " + event.encode() + b"\ndata: " + fast_json_bytes(data) + b"\n\n"
+
+def frame_id(frame: bytes) -> Optional[int]:
+	if not frame.startswith(b"id: "):
+		return None
+	return int(frame[4:frame.index(b"\n")])
+
+KEEPALIVE_FRAME = b": keep-alive\n\n"
+LAGGED_FRAME = sse_frame("resync", {"reason": "lagged"})
+
+def log_channel(user_id: int) -> str:
+	return f"logs:{user_id}"
+
+class Subscription:
+	"""One listener's bounded queue of encoded frames.
+
+	Publishers never wait on a slow listener: once its queue is full the
+	backlog is dropped, a single resync frame is queued and the stream ends
+	after sending it, so the client reloads instead of drifting out of date.
+	"""
+
+	def __init__(self, channel: str, maxsize: int = EVENT_QUEUE_SIZE):
+		self.channel = channel
+		self.lagged = False
+		self._queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize)
+
+	def offer(self, frame: bytes) -> None:
+		if self.lagged:
+			return
+		try:
+			self._queue.put_nowait(frame)
+		except asyncio.QueueFull:
+			self.lagged = True
+			while not self._queue.empty():
+				self._queue.get_nowait()
+			self._queue.put_nowait(LAGGED_FRAME)
+
+	async def frames(self, keepalive: float = EVENT_KEEPALIVE) -> AsyncIterator[bytes]:
+		while True:
+			try:
+				frame = await asyncio.wait_for(self._queue.get(), keepalive)
+			except asyncio.TimeoutError:
+				yield KEEPALIVE_FRAME
+				continue
+			yield frame
+			if self.lagged and self._queue.empty():
+				return
+
+class EventHub:
+	"""Fans encoded frames out to this worker's subscribers, per channel.
+
+	Without a backend, publish delivers locally. With one, publish hands the
+	frame to the backend, which delivers it back to every worker's hub
+	(this one included). Must be used from the event loop.
+	"""
+
+	def __init__(self, backend=None, queue_size: int = EVENT_QUEUE_SIZE):
+		self.backend = backend
+		self.queue_size = queue_size
+		self._channels: Dict[str, Set[Subscription]] = {}
+
+	def wants(self, channel: str) -> bool:
+		"""Whether anyone may be listening; other workers' subscribers are not known here."""
+		return self.backend is not None or channel in self._channels
+
+	def subscribe(self, channel: str) -> Subscription:
+		subscription = Subscription(channel, self.queue_size)
+		self._channels.setdefault(channel, set()).add(subscription)
+		return subscription
+
+	def unsubscribe(self, subscription: Subscription) -> None:
+		subscribers = self._channels.get(subscription.channel)
+		if subscribers is not None:
+			subscribers.discard(subscription)
+			if not subscribers:
+				del self._channels[subscription.channel]
+
+	async def publish(self, channel: str, frame: bytes) -> None:
+		if self.backend is None:
+			self.deliver(channel, frame)
+			return
+		try:
+			await self.backend.publish(channel, frame)
+		except Exception:
+			# Live updates are best effort; the write itself already committed
+			logger.warning("Could not publish to %s", channel, exc_info=True)
+
+	def deliver(self, channel: str, frame: bytes) -> None:
+		for subscription in tuple(self._channels.get(channel, ())):
+			subscription.offer(frame)
+
+	async def start(self) -> None:
+		if self.backend is not None:
+			await self.backend.start(self.deliver)
+
+	async def close(self) -> None:
+		if self.backend is not None:
+			await self.backend.close()
+
+class RedisBackend:
+	"""Relays frames between workers over Redis pub/sub (pip install redis)."""
+
+	prefix = "carbon:"
+
+	def __init__(self, url: str):
+		self.url = url
+		self._redis = None
+		self._task: Optional[asyncio.Task] = None
+
+	async def start(self, deliver: Callable[[str, bytes], None]) -> None:
+		try:
+			import redis.asyncio as redis
+		except ImportError:
+			raise RuntimeError("EVENT_BACKEND_URL needs the redis package (pip install redis)")
+		self._redis = redis.from_url(self.url)
+		self._task = asyncio.create_task(self._listen(deliver))
+
+	async def _listen(self, deliver: Callable[[str, bytes], None]) -> None:
+		while True:
+			pubsub = self._redis.pubsub()
+			try:
+				await pubsub.psubscribe(self.prefix + "*")
+				async for message in pubsub.listen():
+					if message["type"] == "pmessage":
+						deliver(message["channel"].decode()[len(self.prefix):], message["data"])
+			except asyncio.CancelledError:
+				raise
+			except Exception:
+				logger.warning("Lost the event backend connection; reconnecting", exc_info=True)
+			finally:
+				await pubsub.aclose()
+			await asyncio.sleep(1)
+
+	async def publish(self, channel: str, frame: bytes) -> None:
+		await self._redis.publish(self.prefix + channel, frame)
+
+	async def close(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			try:
+				await self._task
+			except asyncio.CancelledError:
+				pass
+		if self._redis is not None:
+			await self._redis.aclose()
+
+def make_backend(url: str):
+	if not url:
+		return None
+	if url.startswith(("redis://", "rediss://", "unix://")):
+		return RedisBackend(url)
+	raise ValueError(f"Unsupported EVENT_BACKEND_URL '{url}'")
+
+events = EventHub(make_backend(EVENT_BACKEND_URL))
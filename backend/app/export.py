@@ -0,0 +1,160 @@
+import csv
+import io
+from datetime import date
+from typing import List, Optional, Sequence
+from sqlalchemy import select
+from .models import Log
+
+EXPORT_BATCH_SIZE = 10000
+
+# Exported columns in their default order; rows are selected as plain tuples
+EXPORT_COLUMNS = {
+	"id": Log.id,
+	"user_id": Log.user_id,
+	"date": Log.date,
+	"travel_km": Log.travel_km,
+	"travel_mode": Log.travel_mode,
+	"electricity_kwh": Log.electricity_kwh,
+	"diet": Log.diet,
+	"travel_kg": Log.travel_kg,
+	"electricity_kg": Log.electricity_kg,
+	"food_kg": Log.food_kg,
+	"total_kg": Log.total_kg,
+	"factor_version": Log.factor_version,
+}
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+	"csv": ("text/csv", "csv"),
+	"parquet": ("application/vnd.apache.parquet", "parquet"),
+	"arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+def _pyarrow():
+	try:
+		import pyarrow
+		import pyarrow.ipc  # noqa: F401
+		import pyarrow.parquet  # noqa: F401
+	except ImportError:
+		return None
+	return pyarrow
+
+def pyarrow_available() -> bool:
+	return _pyarrow() is not None
+
+def parse_columns(spec: Optional[str]) -> List[str]:
+	"""Comma separated column names, or every column when empty."""
+	if not spec:
+		return list(EXPORT_COLUMNS)
+	columns = [name.strip() for name in spec.split(",") if name.strip()]
+	unknown = [name for name in columns if name not in EXPORT_COLUMNS]
+	if unknown:
+		raise ValueError(f"Unknown export column(s): {', '.join(unknown)}")
+	if not columns:
+		raise ValueError("No export columns selected")
+	return columns
+
+def export_query(columns: Sequence[str], user_id: Optional[int] = None, date_from: Optional[date] = None, date_to: Optional[date] = None):
+	query = select(*(EXPORT_COLUMNS[name] for name in columns))
+	if user_id is not None:
+		query = query.where(Log.user_id == user_id)
+	if date_from is not None:
+		query = query.where(Log.date >= date_from)
+	if date_to is not None:
+		query = query.where(Log.date <= date_to)
+	return query.order_by(Log.id.asc())
+
+def _arrow_type(pa, name: str):
+	if name in ("id", "user_id", "factor_version"):
+		return pa.int64()
+	if name == "date":
+		return pa.date32()
+	if name in ("travel_mode", "diet"):
+		return pa.string()
+	return pa.float64()
+
+class _Sink:
+	"""Write-only file object that hands back whatever was written since the last drain."""
+
+	closed = False
+
+	def __init__(self):
+		self._chunks = []
+		self._position = 0
+
+	def write(self, data) -> int:
+		data = bytes(data)
+		self._chunks.append(data)
+		self._position += len(data)
+		return len(data)
+
+	def tell(self) -> int:
+		# Parquet footers store absolute offsets, so this keeps counting across drains
+		return self._position
+
+	def writable(self) -> bool:
+		return True
+
+	def flush(self) -> None:
+		pass
+
+	def close(self) -> None:
+		self.closed = True
+
+	def drain(self) -> bytes:
+		data = b"".join(self._chunks)
+		self._chunks.clear()
+		return data
+
+class ExportWriter:
+	"""Encode batches of row tuples incrementally as CSV, Parquet or Arrow IPC.
+
+	`write` and `close` return the bytes produced so far, so the caller can
+	stream them to a socket or file without holding the whole export.
+	"""
+
+	def __init__(self, format: str, columns: Sequence[str]):
+		if format not in EXPORT_FORMATS:
+			raise ValueError(f"Unsupported export format '{format}'")
+		self.format = format
+		self.columns = list(columns)
+		self._sink = _Sink()
+		if format == "csv":
+			self._text = io.StringIO()
+			self._csv = csv.writer(self._text, lineterminator="\n")
+			self._csv.writerow(self.columns)
+			return
+		pa = _pyarrow()
+		if pa is None:
+			raise RuntimeError("Parquet and Arrow exports require pyarrow (pip install pyarrow)")
+		self._pa = pa
+		self._schema = pa.schema([(name, _arrow_type(pa, name)) for name in self.columns])
+		if format == "parquet":
+			self._writer = pa.parquet.ParquetWriter(self._sink, self._schema)
+		else:
+			self._writer = pa.ipc.new_stream(self._sink, self._schema)
+
+	def _csv_bytes(self) -> bytes:
+		data = self._text.getvalue().encode("utf-8")
+		self._text.seek(0)
+		self._text.truncate()
+		return data
+
+	def write(self, rows) -> bytes:
+		if self.format == "csv":
+			self._csv.writerows(rows)
+			return self._csv_bytes()
+		if not rows:
+			return b""
+		arrays = [
+			self._pa.array(values, type=field.type)
+			for values, field in zip(zip(*rows), self._schema)
+		]
+		self._writer.write_batch(self._pa.record_batch(arrays, schema=self._schema))
+		return self._sink.drain()
+
+	def close(self) -> bytes:
+		if self.format == "csv":
+			return self._csv_bytes()
+		self._writer.close()
+		return self._sink.drain()
@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .logic import EMISSION_FACTORS
+from .models import EmissionFactorSet
+
+# How long a worker trusts its cached "current version" before re-checking
+# the database; publishing through this process invalidates immediately.
+FACTOR_CACHE_TTL = float(os.getenv('FACTOR_CACHE_TTL', '30'))
+
+class FactorSet(NamedTuple):
+	version: int
+	factors: dict
+
+class FactorRegistry:
+	"""Versioned emission factor sets stored in the database and cached in memory.
+
+	Factor sets are immutable once published, so any version can be cached
+	forever; only the pointer to the current version expires.
+	"""
+
+	def __init__(self, ttl: float = FACTOR_CACHE_TTL):
+		self.ttl = ttl
+		self._lock = threading.Lock()
+		self._versions: Dict[int, FactorSet] = {}
+		self._current: Optional[FactorSet] = None
+		self._checked_at = 0.0
+
+	def cached_current(self) -> Optional[FactorSet]:
+		if self._current is not None and time.monotonic() - self._checked_at < self.ttl:
+			return self._current
+		return None
+
+	def invalidate(self) -> None:
+		with self._lock:
+			self._current = None
+			self._checked_at = 0.0
+
+	def _load(self, row: EmissionFactorSet) -> FactorSet:
+		factor_set = self._versions.get(row.version)
+		if factor_set is None:
+			factor_set = FactorSet(row.version, json.loads(row.factors))
+			self._versions[row.version] = factor_set
+		return factor_set
+
+	def current(self, db: Session) -> FactorSet:
+		cached = self.cached_current()
+		if cached is not None:
+			return cached
+		row = db.execute(
+			select(EmissionFactorSet).order_by(EmissionFactorSet.version.desc()).limit(1)
+		).scalars().first()
+		factor_set = self._load(row) if row else FactorSet(1, EMISSION_FACTORS)
+		with self._lock:
+			self._current, self._checked_at = factor_set, time.monotonic()
+		return factor_set
+
+	async def current_async(self, db: AsyncSession) -> FactorSet:
+		cached = self.cached_current()
+		if cached is not None:
+			return cached
+		return await db.run_sync(self.current)
+
+	def get(self, db: Session, version: int) -> Optional[FactorSet]:
+		if version in self._versions:
+			return self._versions[version]
+		row = db.get(EmissionFactorSet, version)
+		return self._load(row) if row else None
+
+	def publish(self, db: Session, factors: dict, note: Optional[str] = None) -> FactorSet:
+		version = (db.execute(select(func.max(EmissionFactorSet.version))).scalar() or 0) + 1
+		db.add(EmissionFactorSet(version=version, factors=json.dumps(factors), note=note))
+		db.commit()
+		self.invalidate()
+		return self.current(db)
+
+registry = FactorRegistry()
+
+def seed_factor_sets(db: Session) -> bool:
+	"""Store the built-in EMISSION_FACTORS as version 1 if no factor set exists yet."""
+	if db.execute(select(EmissionFactorSet.version).limit(1)).first():
+		return False
+	db.add(EmissionFactorSet(version=1, factors=json.dumps(EMISSION_FACTORS), note="built-in defaults"))
+	db.commit()
+	return True
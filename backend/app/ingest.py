@@ -0,0 +1,138 @@
+import time
+from typing import List, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from .factors import FactorSet, registry
+from .logic import calculate_emissions
+from .models import Log
+from .ranking import distribution
+from .rollups import apply_to_rollups, log_rollup_entry, user_totals
+from .schemas import LogCreate
+from .serialize import log_entry
+
+BULK_CHUNK_SIZE = 1000
+
+def _add_log(db: Session, user_id: int, item: LogCreate, factor_set: FactorSet) -> Log:
+	travel_kg, electricity_kg, food_kg, total_kg = calculate_emissions(
+		item.travelKm, item.travelMode, item.electricityKwh, item.diet, factor_set.factors
+	)
+	log = Log(
+		user_id=user_id,
+		date=item.date,
+		travel_km=item.travelKm,
+		travel_mode=item.travelMode,
+		electricity_kwh=item.electricityKwh,
+		diet=item.diet,
+		travel_kg=travel_kg,
+		electricity_kg=electricity_kg,
+		food_kg=food_kg,
+		total_kg=total_kg,
+		factor_version=factor_set.version,
+	)
+	db.add(log)
+	apply_to_rollups(db, [log_rollup_entry(log)])
+	return log
+
+def insert_log(db: Session, user_id: int, item: LogCreate, factor_set: FactorSet) -> dict:
+	"""Add one log and its rollup deltas in the caller's transaction; returns the LogEntry dict."""
+	return log_entry(_add_log(db, user_id, item, factor_set))
+
+def insert_log_live(db: Session, user_id: int, item: LogCreate, factor_set: FactorSet) -> Tuple[dict, dict]:
+	"""insert_log for users with live subscribers: also returns the update to push to them.
+
+	The totals are read in the same transaction, right after the insert, so
+	they are exactly the user's totals as of this log.
+	"""
+	log = _add_log(db, user_id, item, factor_set)
+	db.flush()
+	entry = log_entry(log)
+	return entry, {"id": log.id, "entry": entry, "totals": user_totals(db, user_id)}
+
+def build_log_rows(user_id: int, items: List[LogCreate], factor_set: FactorSet) -> List[dict]:
+	# numpy is only needed once someone imports in bulk
+	import numpy as np
+	from .batch import calculate_emissions_batch
+	n = len(items)
+	travel_km = np.fromiter((i.travelKm for i in items), dtype=float, count=n)
+	electricity_kwh = np.fromiter((i.electricityKwh for i in items), dtype=float, count=n)
+	travel_kg, electricity_kg, food_kg, total_kg = calculate_emissions_batch(
+		travel_km, [i.travelMode for i in items], electricity_kwh, [i.diet for i in items], factor_set.factors
+	)
+	return [
+		{
+			"user_id": user_id,
+			"date": item.date,
+			"travel_km": item.travelKm,
+			"travel_mode": item.travelMode,
+			"electricity_kwh": item.electricityKwh,
+			"diet": item.diet,
+			"travel_kg": t,
+			"electricity_kg": e,
+			"food_kg": f,
+			"total_kg": tot,
+			"factor_version": factor_set.version,
+		}
+		for item, t, e, f, tot in zip(
+			items, travel_kg.tolist(), electricity_kg.tolist(), food_kg.tolist(), total_kg.tolist()
+		)
+	]
+
+def _rollup_entries(rows: List[dict]):
+	return (
+		(r["user_id"], r["date"], r["travel_kg"], r["electricity_kg"], r["food_kg"], r["total_kg"], 1)
+		for r in rows
+	)
+
+def insert_log_rows(db: Session, rows: List[dict], indexes: List[int]) -> Tuple[List[dict], List[dict]]:
+	"""Insert one chunk and its rollup deltas in the caller's transaction; returns (inserted rows, errors)."""
+	try:
+		with db.begin_nested():
+			db.execute(insert(Log), rows)
+		inserted, errors = rows, []
+	except SQLAlchemyError:
+		# Slow path for a chunk the database rejected: isolate the offending
+		# rows with savepoints so the rest of the chunk still lands.
+		inserted, errors = [], []
+		for index, row in zip(indexes, rows):
+			try:
+				with db.begin_nested():
+					db.execute(insert(Log), [row])
+				inserted.append(row)
+			except SQLAlchemyError as exc:
+				errors.append({"row": index, "errors": [{"loc": [], "msg": str(getattr(exc, "orig", None) or exc), "type": "database_error"}]})
+	apply_to_rollups(db, _rollup_entries(inserted))
+	return inserted, errors
+
+def _chunks(user_id: int, items: List[Tuple[int, LogCreate]], factor_set: FactorSet, chunk_size: int):
+	for start in range(0, len(items), chunk_size):
+		chunk = items[start:start + chunk_size]
+		yield build_log_rows(user_id, [item for _, item in chunk], factor_set), [index for index, _ in chunk]
+
+def bulk_insert_logs(db: Session, user_id: int, items: List[Tuple[int, LogCreate]], chunk_size: int = BULK_CHUNK_SIZE) -> dict:
+	"""Insert validated rows with multi-row INSERTs, committing once per chunk."""
+	started = time.perf_counter()
+	factor_set = registry.current(db)
+	inserted, errors = 0, []
+	for rows, indexes in _chunks(user_id, items, factor_set, chunk_size):
+		ok, failed = insert_log_rows(db, rows, indexes)
+		db.commit()
+		distribution.observe(r["total_kg"] for r in ok)
+		inserted += len(ok)
+		errors.extend(failed)
+	return {"inserted": inserted, "errors": errors, "elapsed": time.perf_counter() - started}
+
+async def bulk_insert_logs_queued(write_queue, user_id: int, items: List[Tuple[int, LogCreate]], factor_set: FactorSet, chunk_size: int = BULK_CHUNK_SIZE) -> dict:
+	"""bulk_insert_logs through the single SQLite writer, one queued job (and commit) per chunk.
+
+	Chunks are queued one at a time, so single-log writes from other
+	requests get their turn between them.
+	"""
+	started = time.perf_counter()
+	inserted, errors = 0, []
+	for rows, indexes in _chunks(user_id, items, factor_set, chunk_size):
+		ok, failed = await write_queue.run(insert_log_rows, rows, indexes)
+		distribution.observe(r["total_kg"] for r in ok)
+		inserted += len(ok)
+		errors.extend(failed)
+	return {"inserted": inserted, "errors": errors, "elapsed": time.perf_counter() - started}
@@ -1,17 +1,28 @@
+import logging
 import os
+import secrets
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
 
-# JWT Configuration
-SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
+logger = logging.getLogger(__name__)
+
+# JWT Configuration. Without SECRET_KEY each process signs with its own
+# random key, so tokens stop working on restart and across workers.
+SECRET_KEY = os.getenv("SECRET_KEY")
+if not SECRET_KEY:
+	SECRET_KEY = secrets.token_urlsafe(32)
+	logger.warning("SECRET_KEY is not set; using a random per-process key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing; passlib and jose are imported on first use to keep
+# them off the cold-start path
+@lru_cache(maxsize=None)
+def get_pwd_context():
+	from passlib.context import CryptContext
+	return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 EMISSION_FACTORS = {
 	"travelPerKmKg": {
@@ -30,11 +41,11 @@ EMISSION_FACTORS = {
 	},
 }
 
-def calculate_emissions(travel_km: float, travel_mode: str, electricity_kwh: float, diet: str):
-	travel_factor = EMISSION_FACTORS["travelPerKmKg"].get(travel_mode, EMISSION_FACTORS["travelPerKmKg"]["car"])
+def calculate_emissions(travel_km: float, travel_mode: str, electricity_kwh: float, diet: str, factors: dict = EMISSION_FACTORS):
+	travel_factor = factors["travelPerKmKg"].get(travel_mode, factors["travelPerKmKg"]["car"])
 	travel_kg = round(float(travel_km) * travel_factor, 2)
-	electricity_kg = round(float(electricity_kwh) * EMISSION_FACTORS["electricityPerKwhKg"], 2)
-	food_kg = EMISSION_FACTORS["foodPerDayKg"].get(diet, EMISSION_FACTORS["foodPerDayKg"]["mixed"])
+	electricity_kg = round(float(electricity_kwh) * factors["electricityPerKwhKg"], 2)
+	food_kg = factors["foodPerDayKg"].get(diet, factors["foodPerDayKg"]["mixed"])
 	total_kg = round(travel_kg + electricity_kg + food_kg, 2)
 	return travel_kg, electricity_kg, food_kg, total_kg
 
@@ -43,27 +54,34 @@ def compute_eco_score(total_kg: float) -> int:
 	score = 100 - (total_kg / target) * 100
 	return max(0, min(100, round(score)))
 
+TIP_SHORT_TRIPS = 'Try walking or cycling for trips under 3 km when feasible.'
+TIP_PUBLIC_TRANSPORT = 'Carpool or use public transport 2x/week to reduce travel emissions.'
+TIP_ELECTRICITY = 'Switch to LED lighting and unplug idle devices to cut energy use ~15%.'
+TIP_DIET = 'Swap one meat meal per day with plant-based options (~20% lower food emissions).'
+TIP_WEEKLY_GOAL = 'Set a weekly goal to reduce total emissions by 10%.'
+
 def generate_tips(travel_km: float, travel_mode: str, electricity_kwh: float, diet: str, total_kg: float):
 	tips = []
 	if travel_mode == 'car' and travel_km > 0:
-		tips.append('Try walking or cycling for trips under 3 km when feasible.')
-		tips.append('Carpool or use public transport 2x/week to reduce travel emissions.')
+		tips.append(TIP_SHORT_TRIPS)
+		tips.append(TIP_PUBLIC_TRANSPORT)
 	if electricity_kwh > 0:
-		tips.append('Switch to LED lighting and unplug idle devices to cut energy use ~15%.')
+		tips.append(TIP_ELECTRICITY)
 	if diet in ('nonveg', 'mixed'):
-		tips.append('Swap one meat meal per day with plant-based options (~20% lower food emissions).')
+		tips.append(TIP_DIET)
 	if total_kg > 15:
-		tips.append('Set a weekly goal to reduce total emissions by 10%.')
+		tips.append(TIP_WEEKLY_GOAL)
 	return tips
 
 # Authentication functions
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-	return pwd_context.verify(plain_password, hashed_password)
+	return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-	return pwd_context.hash(password)
+	return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+	from jose import jwt
 	to_encode = data.copy()
 	if expires_delta:
 		expire = datetime.utcnow() + expires_delta
@@ -73,20 +91,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 	encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 	return encoded_jwt
 
-def verify_token(token: str):
+def decode_token(token: str) -> dict:
+	from jose import JWTError, jwt
 	try:
 		payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-		email: str = payload.get("sub")
-		if email is None:
-			raise HTTPException(
-				status_code=status.HTTP_401_UNAUTHORIZED,
-				detail="Could not validate credentials",
-				headers={"WWW-Authenticate": "Bearer"},
-			)
-		return email
 	except JWTError:
 		raise HTTPException(
 			status_code=status.HTTP_401_UNAUTHORIZED,
 			detail="Could not validate credentials",
 			headers={"WWW-Authenticate": "Bearer"},
 		)
+	if payload.get("sub") is None:
+		raise HTTPException(
+			status_code=status.HTTP_401_UNAUTHORIZED,
+			detail="Could not validate credentials",
+			headers={"WWW-Authenticate": "Bearer"},
+		)
+	return payload
+
+def verify_token(token: str):
+	return decode_token(token)["sub"]
@@ -1,21 +1,91 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+import asyncio
+import logging
+import math
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from datetime import timedelta
-from .database import Base, engine, get_db
-from .models import Log, User
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, timedelta
+from typing import Literal, Optional
+from .database import AsyncSessionLocal, async_engine, engine, get_async_db
+from .models import Log, LogRollup, RecomputeJob, User
 from .schemas import (
-	ComputeRequest, ComputeResponse, LogResponse, LogEntry,
+	ComputeRequest, ComputeResponse, ComputeBatchResponse, LogCreate, LogResponse, LogEntry,
+	BulkImportResponse, StatsResponse, FactorSetCreate, FactorSetResponse, RecomputeJobResponse,
+	RankDistributionResponse, RankResponse, SimulationRequest, SimulationResponse,
 	UserCreate, UserLogin, UserResponse, Token
 )
 from .logic import (
-	calculate_emissions, compute_eco_score, generate_tips
+	ACCESS_TOKEN_EXPIRE_MINUTES, calculate_emissions, compute_eco_score, create_access_token, generate_tips
 )
+from .auth import authorize_user, check_password, hash_password, require_admin
+from .cache import TTLCache, etag_matches
+from .export import EXPORT_BATCH_SIZE, EXPORT_FORMATS, ExportWriter, export_query, parse_columns
+from .factors import registry
+from .events import events, frame_id, log_channel, sse_frame
+from .ingest import bulk_insert_logs, bulk_insert_logs_queued, insert_log, insert_log_live
+from .metrics import MetricsMiddleware, instrument_engine, registry as metrics_registry
+from .migrations import migrate
+from .payloads import parse_items, parse_rows, batch_openapi
+from .ranking import RANK_QUANTILES, distribution
+from .recompute import run_recompute_job, start_recompute_job
+from .rollups import user_totals
+from .serialize import LOG_ENTRY_COLUMNS, json_response, log_entry, ndjson_lines
+from .users import insert_user, log_versions, update_user, require_active_user, user_cache
+from .writer import write_queue
 
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Carbon Tracker API")
+# Schema migrations run when the app starts, not on import. Set
+# MIGRATE_ON_STARTUP=0 to skip them (e.g. for scale-to-zero containers) and
+# run `python migrate_db.py` as a release step instead.
+MIGRATE_ON_STARTUP = os.getenv('MIGRATE_ON_STARTUP', '1') == '1'
+
+# /compute is a pure function of its inputs and the factor version
+compute_cache = TTLCache(
+	maxsize=int(os.getenv('COMPUTE_CACHE_SIZE', '4096')),
+	ttl=float(os.getenv('COMPUTE_CACHE_TTL', '300')),
+)
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+	if etag_matches(request.headers.get("if-none-match"), etag):
+		return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+	return None
+
+async def _write(db: AsyncSession, fn, *args):
+	"""Run fn(session, *args) and commit: through the single writer on SQLite, else on the request's session."""
+	if write_queue is not None:
+		return await write_queue.run(fn, *args)
+	result = await db.run_sync(fn, *args)
+	await db.commit()
+	return result
+
+async def _sync_distribution(db: AsyncSession) -> None:
+	if write_queue is not None:
+		await distribution.maybe_sync_queued(write_queue)
+	else:
+		await db.run_sync(distribution.maybe_sync)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	loop = asyncio.get_running_loop()
+	if MIGRATE_ON_STARTUP:
+		for message in await loop.run_in_executor(None, migrate, engine):
+			logger.info("Migration applied: %s", message)
+	await events.start()
+	yield
+	await events.close()
+	if write_queue is not None:
+		await loop.run_in_executor(None, write_queue.close)
+	await async_engine.dispose()
+
+app = FastAPI(title="Carbon Tracker API", lifespan=lifespan)
 
 app.add_middleware(
 	CORSMiddleware,
@@ -38,125 +108,484 @@ app.add_middleware(
 	allow_headers=["*"],
 )
 
+def _finite_input(value):
+	if isinstance(value, float) and not math.isfinite(value):
+		return str(value)
+	if isinstance(value, dict):
+		return {key: _finite_input(item) for key, item in value.items()}
+	if isinstance(value, (list, tuple)):
+		return [_finite_input(item) for item in value]
+	return value
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_error(request: Request, exc: RequestValidationError):
+	# The default handler echoes each rejected input (a whole object for a
+	# missing field), and json.dumps cannot encode the inf/NaN they may hold
+	errors = [dict(error, input=_finite_input(error["input"])) if "input" in error else error for error in exc.errors()]
+	return await request_validation_exception_handler(request, RequestValidationError(errors))
+
+if os.getenv('METRICS_ENABLED', '1') == '1':
+	app.add_middleware(MetricsMiddleware)
+	instrument_engine(engine)
+	instrument_engine(async_engine.sync_engine)
+
 @app.get("/")
 async def root():
 	return {"message": "Carbon Tracker API is running!", "status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+	# Prometheus text exposition format
+	return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 # Authentication endpoints
 @app.post('/register', response_model=UserResponse)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
-	# Check if user already exists
-	if db.query(User).filter(User.email == user_data.email).first():
-		raise HTTPException(
-			status_code=status.HTTP_400_BAD_REQUEST,
-			detail="Email already registered"
-		)
-	if db.query(User).filter(User.username == user_data.username).first():
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
+	hashed_password = await hash_password(user_data.password)
+	try:
+		# The unique indexes on email and username do the duplicate check
+		user = await _write(db, insert_user, user_data.email, user_data.username, hashed_password)
+	except IntegrityError:
+		await db.rollback()
+		email_taken = (await db.execute(select(User.id).where(User.email == user_data.email))).first()
 		raise HTTPException(
 			status_code=status.HTTP_400_BAD_REQUEST,
-			detail="Username already taken"
+			detail="Email already registered" if email_taken else "Username already taken"
 		)
-	
-	# Create new user (simple - no password hashing)
-	user = User(
-		email=user_data.email,
-		username=user_data.username,
-		hashed_password=user_data.password  # Store plain text password
-	)
-	db.add(user)
-	db.commit()
-	db.refresh(user)
+	user_cache.set(user["id"], True)
 	return user
 
-@app.post('/login', response_model=UserResponse)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-	user = db.query(User).filter(User.email == user_credentials.email).first()
-	if not user or user.hashed_password != user_credentials.password:
+@app.post('/login', response_model=Token)
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
+	user = (await db.execute(select(User).where(User.email == user_credentials.email))).scalars().first()
+	valid, new_hash = await check_password(user_credentials.password, user.hashed_password if user else None)
+	if not valid:
 		raise HTTPException(
 			status_code=status.HTTP_401_UNAUTHORIZED,
 			detail="Incorrect email or password"
 		)
+	if user.is_active is False:
+		raise HTTPException(
+			status_code=status.HTTP_403_FORBIDDEN,
+			detail="User is deactivated"
+		)
+	if new_hash:
+		# Upgrade plain-text or outdated hashes on successful login
+		await _write(db, update_user, user.id, {"hashed_password": new_hash})
 	
-	return user
+	access_token = create_access_token(
+		data={"sub": user.email, "uid": user.id},
+		expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+	)
+	return {"access_token": access_token, "token_type": "bearer", "user": user}
+
+async def _set_active(db: AsyncSession, user_id: int, active: bool) -> dict:
+	user = await db.get(User, user_id)
+	if not user:
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="User not found"
+		)
+	await _write(db, update_user, user_id, {"is_active": active})
+	user_cache.set(user_id, active)
+	return {"id": user.id, "email": user.email, "username": user.username, "is_active": active}
+
+@app.post('/users/{user_id}/deactivate', response_model=UserResponse, dependencies=[Depends(require_admin)])
+async def deactivate_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+	# Existing tokens stay valid, but every user-scoped endpoint now answers 403
+	return await _set_active(db, user_id, False)
+
+@app.post('/users/{user_id}/activate', response_model=UserResponse, dependencies=[Depends(require_admin)])
+async def activate_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+	return await _set_active(db, user_id, True)
 
 @app.post('/compute', response_model=ComputeResponse)
-async def compute(payload: ComputeRequest):
+async def compute(payload: ComputeRequest, db: AsyncSession = Depends(get_async_db)):
+	factor_set = await registry.current_async(db)
+	# The date does not affect the result, so it is left out of the key
+	# -0.0 == 0.0 and both hash alike, but the response echoes the sign back
+	key = (factor_set.version, repr(payload.travelKm), payload.travelMode, repr(payload.electricityKwh), payload.diet)
+	cached = compute_cache.get(key)
+	if cached is not None:
+		return json_response(cached)
+	
 	travel_kg, electricity_kg, food_kg, total_kg = calculate_emissions(
-		payload.travelKm, payload.travelMode, payload.electricityKwh, payload.diet
+		payload.travelKm, payload.travelMode, payload.electricityKwh, payload.diet, factor_set.factors
 	)
 	eco = compute_eco_score(total_kg)
 	tips = generate_tips(payload.travelKm, payload.travelMode, payload.electricityKwh, payload.diet, total_kg)
-	return {
+	result = {
 		"travelKg": travel_kg,
 		"electricityKg": electricity_kg,
-		"foodKg": food_kg,
+		"foodKg": float(food_kg),
 		"totalKg": total_kg,
 		"ecoScore": eco,
 		"tips": tips
 	}
+	compute_cache.set(key, result)
+	return json_response(result)
 
-@app.post('/logs/{user_id}', response_model=LogEntry)
-async def create_log(user_id: int, payload: ComputeRequest, db: Session = Depends(get_db)):
-	# Verify user exists
-	user = db.query(User).filter(User.id == user_id).first()
-	if not user:
-		raise HTTPException(
-			status_code=status.HTTP_404_NOT_FOUND,
-			detail="User not found"
-		)
+@app.post('/compute/batch', response_model=ComputeBatchResponse, openapi_extra=batch_openapi(ComputeRequest))
+async def compute_many(request: Request, db: AsyncSession = Depends(get_async_db)):
+	from .batch import compute_batch  # pulls in numpy; loaded on first batch request
+	# Accepts a JSON array or an NDJSON stream of ComputeRequest items
+	items = await parse_items(request, ComputeRequest)
+	factor_set = await registry.current_async(db)
+	return {"items": compute_batch(items, factor_set.factors)}
+
+@app.post('/logs/{user_id}', response_model=LogEntry, dependencies=[Depends(authorize_user)])
+async def create_log(user_id: int, payload: LogCreate, db: AsyncSession = Depends(get_async_db)):
+	await require_active_user(db, user_id)
 	
-	travel_kg, electricity_kg, food_kg, total_kg = calculate_emissions(
-		payload.travelKm, payload.travelMode, payload.electricityKwh, payload.diet
+	factor_set = await registry.current_async(db)
+	# With live subscribers the insert also reads back the user's new totals
+	channel = log_channel(user_id)
+	job = insert_log_live if events.wants(channel) else insert_log
+	# On SQLite the single writer group-commits concurrent inserts
+	result = await _write(db, job, user_id, payload, factor_set)
+	entry, update = result if job is insert_log_live else (result, None)
+	log_versions.invalidate(user_id)
+	distribution.observe([entry["totalKg"]])
+	if update is not None:
+		await events.publish(channel, sse_frame("log", update, event_id=update["id"]))
+	await _sync_distribution(db)
+	return json_response(entry)
+
+@app.post('/logs/{user_id}/bulk', response_model=BulkImportResponse, openapi_extra=batch_openapi(LogCreate, with_csv=True), dependencies=[Depends(authorize_user)])
+async def import_logs(user_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+	await require_active_user(db, user_id)
+	
+	# Accepts a JSON array, NDJSON or CSV; invalid rows are reported, not fatal
+	items, invalid = await parse_rows(request, LogCreate)
+	if write_queue is not None:
+		factor_set = await registry.current_async(db)
+		result = await bulk_insert_logs_queued(write_queue, user_id, items, factor_set)
+	else:
+		result = await db.run_sync(bulk_insert_logs, user_id, items)
+	if result["inserted"]:
+		log_versions.invalidate(user_id)
+		channel = log_channel(user_id)
+		if events.wants(channel):
+			# Too many rows to push one by one; listeners reload instead
+			totals = await db.run_sync(user_totals, user_id)
+			await events.publish(channel, sse_frame("resync", {"reason": "import", "totals": totals}))
+		await _sync_distribution(db)
+	errors = sorted(invalid + result["errors"], key=lambda e: e["row"])
+	elapsed = result["elapsed"]
+	return {
+		"received": len(items) + len(invalid),
+		"inserted": result["inserted"],
+		"failed": len(errors),
+		"errors": errors,
+		"elapsedMs": round(elapsed * 1000, 3),
+		"rowsPerSecond": round(result["inserted"] / elapsed, 1) if elapsed > 0 else 0.0,
+	}
+
+STREAM_BATCH_SIZE = 500
+
+def _log_page_query(user_id: int, after: Optional[int], date_from: Optional[date], date_to: Optional[date]):
+	query = select(Log.id, *LOG_ENTRY_COLUMNS).where(Log.user_id == user_id)
+	if date_from is not None:
+		query = query.where(Log.date >= date_from)
+	if date_to is not None:
+		query = query.where(Log.date <= date_to)
+	if after is not None:
+		query = query.where(Log.id > after)
+	return query.order_by(Log.id.asc())
+
+async def _stream_logs(query):
+	# Uses its own session: the request-scoped one is closed before the
+	# response body is sent.
+	async with AsyncSessionLocal() as db:
+		result = await db.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+		async for rows in result.partitions():
+			yield ndjson_lines(rows)
+
+@app.get('/logs/{user_id}', response_model=LogResponse, responses={200: {"content": {"application/x-ndjson": {}}}}, dependencies=[Depends(authorize_user)])
+async def list_logs(
+	request: Request,
+	response: Response,
+	user_id: int,
+	limit: Optional[int] = Query(None, ge=1, le=1000),
+	after: Optional[int] = Query(None, ge=0, description="Return logs with an id greater than this cursor"),
+	date_from: Optional[date] = Query(None, alias="from", description="Only logs on or after this date"),
+	date_to: Optional[date] = Query(None, alias="to", description="Only logs on or before this date"),
+	format: Literal["json", "ndjson"] = "json",
+	db: AsyncSession = Depends(get_async_db),
+):
+	await require_active_user(db, user_id)
+	
+	etag = await log_versions.etag(db, user_id, "logs?" + request.url.query)
+	not_modified = _not_modified(request, etag)
+	if not_modified:
+		return not_modified
+	
+	query = _log_page_query(user_id, after, date_from, date_to)
+	if format == "ndjson":
+		if limit is not None:
+			query = query.limit(limit)
+		return StreamingResponse(_stream_logs(query), media_type="application/x-ndjson", headers={"ETag": etag})
+	
+	response.headers["ETag"] = etag
+	if limit is None:
+		rows = (await db.execute(query)).all()
+		return json_response({"items": [log_entry(r) for r in rows], "nextCursor": None}, response)
+
+	# Keyset pagination: fetch one extra row to know whether another page exists
+	rows = (await db.execute(query.limit(limit + 1))).all()
+	next_cursor = rows[limit - 1].id if len(rows) > limit else None
+	return json_response({"items": [log_entry(r) for r in rows[:limit]], "nextCursor": next_cursor}, response)
+
+def _event_snapshot(db, user_id: int) -> dict:
+	last_id = db.execute(select(func.max(Log.id)).where(Log.user_id == user_id)).scalar()
+	return {"lastLogId": last_id or 0, "totals": user_totals(db, user_id)}
+
+async def _stream_events(user_id: int):
+	subscription = events.subscribe(log_channel(user_id))
+	try:
+		# Subscribed before the snapshot is read, so no write can fall in
+		# between; its own session, so the idle stream holds no connection
+		async with AsyncSessionLocal() as db:
+			snapshot = await db.run_sync(_event_snapshot, user_id)
+		yield sse_frame("snapshot", snapshot)
+		async for frame in subscription.frames():
+			# Logs that committed before the snapshot may still be queued
+			log_id = frame_id(frame)
+			if log_id is not None and log_id <= snapshot["lastLogId"]:
+				continue
+			yield frame
+	finally:
+		events.unsubscribe(subscription)
+
+@app.get('/logs/{user_id}/events', responses={200: {"content": {"text/event-stream": {}}}}, dependencies=[Depends(authorize_user)])
+async def log_events(user_id: int, db: AsyncSession = Depends(get_async_db)):
+	# Server-sent events: a snapshot of the totals, then each new log with the
+	# updated totals; a resync event means reload the logs
+	await require_active_user(db, user_id)
+	return StreamingResponse(
+		_stream_events(user_id),
+		media_type="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
 	)
-	log = Log(
-		user_id=user_id,  # Use actual user ID
-		date=payload.date,
-		travel_km=payload.travelKm,
-		travel_mode=payload.travelMode,
-		electricity_kwh=payload.electricityKwh,
-		diet=payload.diet,
-		travel_kg=travel_kg,
-		electricity_kg=electricity_kg,
-		food_kg=food_kg,
-		total_kg=total_kg,
+
+def _export_writer(format: str, columns: Optional[str]) -> ExportWriter:
+	try:
+		return ExportWriter(format, parse_columns(columns))
+	except ValueError as exc:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+	except RuntimeError as exc:
+		raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc))
+
+async def _stream_export(query, writer: ExportWriter):
+	# Server-side cursor on its own session; only one batch of row tuples is held at a time
+	async with AsyncSessionLocal() as db:
+		result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+		async for rows in result.partitions():
+			yield writer.write(rows)
+	yield writer.close()
+
+def _export_response(query, writer: ExportWriter, name: str) -> StreamingResponse:
+	media_type, extension = EXPORT_FORMATS[writer.format]
+	return StreamingResponse(
+		_stream_export(query, writer),
+		media_type=media_type,
+		headers={"Content-Disposition": f'attachment; filename="{name}.{extension}"'},
 	)
-	db.add(log)
-	db.commit()
-	db.refresh(log)
+
+@app.get('/logs/{user_id}/export', dependencies=[Depends(authorize_user)])
+async def export_user_logs(
+	user_id: int,
+	format: Literal["csv", "parquet", "arrow"] = "csv",
+	columns: Optional[str] = Query(None, description="Comma separated columns to export; all by default"),
+	date_from: Optional[date] = Query(None, alias="from", description="Only logs on or after this date"),
+	date_to: Optional[date] = Query(None, alias="to", description="Only logs on or before this date"),
+	db: AsyncSession = Depends(get_async_db),
+):
+	await require_active_user(db, user_id)
+	
+	writer = _export_writer(format, columns)
+	query = export_query(writer.columns, user_id=user_id, date_from=date_from, date_to=date_to)
+	return _export_response(query, writer, f"logs-user-{user_id}")
+
+@app.get('/export/logs', dependencies=[Depends(require_admin)])
+async def export_logs(
+	format: Literal["csv", "parquet", "arrow"] = "csv",
+	columns: Optional[str] = Query(None, description="Comma separated columns to export; all by default"),
+	user_id: Optional[int] = None,
+	date_from: Optional[date] = Query(None, alias="from", description="Only logs on or after this date"),
+	date_to: Optional[date] = Query(None, alias="to", description="Only logs on or before this date"),
+):
+	writer = _export_writer(format, columns)
+	query = export_query(writer.columns, user_id=user_id, date_from=date_from, date_to=date_to)
+	return _export_response(query, writer, "logs")
+
+@app.get('/stats/{user_id}', response_model=StatsResponse, dependencies=[Depends(authorize_user)])
+async def stats(
+	request: Request,
+	response: Response,
+	user_id: int,
+	granularity: Literal["day", "week", "month"] = "day",
+	db: AsyncSession = Depends(get_async_db),
+):
+	await require_active_user(db, user_id)
+	
+	etag = await log_versions.etag(db, user_id, "stats?" + request.url.query)
+	not_modified = _not_modified(request, etag)
+	if not_modified:
+		return not_modified
+	
+	rows = (await db.execute(
+		select(LogRollup)
+		.where(LogRollup.user_id == user_id, LogRollup.granularity == granularity)
+		.order_by(LogRollup.period.asc())
+	)).scalars()
+	items = [
+		{
+			"period": r.period,
+			"travelKg": round(r.travel_kg, 2),
+			"electricityKg": round(r.electricity_kg, 2),
+			"foodKg": round(r.food_kg, 2),
+			"totalKg": round(r.total_kg, 2),
+			"count": r.count,
+		}
+		for r in rows
+	]
+	response.headers["ETag"] = etag
+	return {"granularity": granularity, "items": items}
+
+# Population ranking, answered from the quantile sketch instead of scanning logs
+@app.get('/rank/distribution', response_model=RankDistributionResponse)
+async def rank_distribution(db: AsyncSession = Depends(get_async_db)):
+	await _sync_distribution(db)
+	sketch = distribution.snapshot()
+	quantiles = []
+	for q in RANK_QUANTILES:
+		value = sketch.quantile(q)
+		if value is not None:
+			quantiles.append({"quantile": q, "totalKg": round(value, 2), "ecoScore": compute_eco_score(value)})
 	return {
-		"date": log.date,
-		"travelKm": log.travel_km,
-		"travelMode": log.travel_mode,
-		"electricityKwh": log.electricity_kwh,
-		"diet": log.diet,
-		"travelKg": log.travel_kg,
-		"electricityKg": log.electricity_kg,
-		"foodKg": log.food_kg,
-		"totalKg": log.total_kg,
+		"population": sketch.count,
+		"averageKg": round(sketch.sum / sketch.count, 2) if sketch.count else None,
+		"relativeAccuracy": sketch.relative_accuracy,
+		"quantiles": quantiles,
 	}
 
-@app.get('/logs/{user_id}', response_model=LogResponse)
-async def list_logs(user_id: int, db: Session = Depends(get_db)):
-	# Verify user exists
-	user = db.query(User).filter(User.id == user_id).first()
-	if not user:
+@app.get('/rank/{user_id}', response_model=RankResponse, dependencies=[Depends(authorize_user)])
+async def rank(user_id: int, db: AsyncSession = Depends(get_async_db)):
+	await require_active_user(db, user_id)
+	
+	await _sync_distribution(db)
+	# A user's all-time totals are the sum of their monthly rollups
+	total_kg, days = (await db.execute(
+		select(func.sum(LogRollup.total_kg), func.sum(LogRollup.count))
+		.where(LogRollup.user_id == user_id, LogRollup.granularity == "month")
+	)).one()
+	sketch = distribution.snapshot()
+	result = {"userId": user_id, "days": days or 0, "population": sketch.count}
+	if not days:
+		return result
+	
+	average = total_kg / days
+	below = sketch.cdf(average)
+	result.update({
+		"averageKg": round(average, 2),
+		"ecoScore": compute_eco_score(average),
+		# Share of all logged days with a larger footprint than this user's average day
+		"percentile": round((1 - below) * 100, 1) if below is not None else None,
+	})
+	return result
+
+# What-if projections: every scenario is evaluated against the stored history in one pass
+@app.post('/simulate/{user_id}', response_model=SimulationResponse, dependencies=[Depends(authorize_user)])
+async def simulate_scenarios(
+	user_id: int,
+	payload: SimulationRequest,
+	date_from: Optional[date] = Query(None, alias="from", description="Only history on or after this date"),
+	date_to: Optional[date] = Query(None, alias="to", description="Only history on or before this date"),
+	db: AsyncSession = Depends(get_async_db),
+):
+	from .simulate import expand_scenarios, simulate  # pulls in numpy; loaded on first simulation
+	await require_active_user(db, user_id)
+	
+	try:
+		scenarios = expand_scenarios(payload)
+	except ValueError as exc:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+	factor_set = await registry.current_async(db)
+	query = select(Log.travel_km, Log.travel_mode, Log.electricity_kwh, Log.diet).where(Log.user_id == user_id)
+	if date_from is not None:
+		query = query.where(Log.date >= date_from)
+	if date_to is not None:
+		query = query.where(Log.date <= date_to)
+	rows = (await db.execute(query)).all()
+	try:
+		# Large grids over long histories take a while; keep them off the event loop
+		result = await asyncio.get_running_loop().run_in_executor(None, simulate, rows, scenarios, factor_set.factors)
+	except ValueError as exc:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+	return {"userId": user_id, "factorVersion": factor_set.version, **result}
+
+# Emission factor registry
+def _factor_set_response(factor_set):
+	return {"version": factor_set.version, "factors": factor_set.factors}
+
+def _job_response(job):
+	return {
+		"id": job.id,
+		"targetVersion": job.target_version,
+		"status": job.status,
+		"processed": job.processed,
+		"updated": job.updated,
+		"total": job.total,
+		"lastLogId": job.last_log_id,
+		"error": job.error,
+	}
+
+@app.get('/factors', response_model=FactorSetResponse)
+async def current_factors(db: AsyncSession = Depends(get_async_db)):
+	return _factor_set_response(await registry.current_async(db))
+
+@app.get('/factors/{version}', response_model=FactorSetResponse)
+async def get_factor_set(version: int, db: AsyncSession = Depends(get_async_db)):
+	found = await db.run_sync(registry.get, version)
+	if not found:
 		raise HTTPException(
 			status_code=status.HTTP_404_NOT_FOUND,
-			detail="User not found"
+			detail="Factor version not found"
 		)
-	
-	rows = db.query(Log).filter(Log.user_id == user_id).order_by(Log.id.asc()).all()
-	items = []
-	for l in rows:
-		items.append({
-			"date": l.date,
-			"travelKm": l.travel_km,
-			"travelMode": l.travel_mode,
-			"electricityKwh": l.electricity_kwh,
-			"diet": l.diet,
-			"travelKg": l.travel_kg,
-			"electricityKg": l.electricity_kg,
-			"foodKg": l.food_kg,
-			"totalKg": l.total_kg,
-		})
-	return {"items": items}
+	return _factor_set_response(found)
+
+@app.post('/factors', response_model=FactorSetResponse, dependencies=[Depends(require_admin)])
+async def publish_factors(payload: FactorSetCreate, db: AsyncSession = Depends(get_async_db)):
+	published = await db.run_sync(registry.publish, payload.factors.model_dump(), payload.note)
+	compute_cache.clear()
+	return _factor_set_response(published)
+
+@app.post('/factors/recompute', response_model=RecomputeJobResponse, dependencies=[Depends(require_admin)])
+async def recompute_logs(
+	background_tasks: BackgroundTasks,
+	version: Optional[int] = Query(None, description="Factor version to recompute with; defaults to the current one"),
+	db: AsyncSession = Depends(get_async_db),
+):
+	if version is None:
+		version = (await registry.current_async(db)).version
+	elif not await db.run_sync(registry.get, version):
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="Factor version not found"
+		)
+	job = await db.run_sync(start_recompute_job, version)
+	# Runs in the threadpool after the response, one short transaction per chunk
+	background_tasks.add_task(run_recompute_job, job.id, on_progress=lambda _: log_versions.clear())
+	return _job_response(job)
+
+@app.get('/factors/recompute/{job_id}', response_model=RecomputeJobResponse, dependencies=[Depends(require_admin)])
+async def recompute_status(job_id: int, db: AsyncSession = Depends(get_async_db)):
+	job = await db.get(RecomputeJob, job_id)
+	if not job:
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="Recompute job not found"
+		)
+	return _job_response(job)
@@ -0,0 +1,152 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("app.slow_requests")
+
+# Requests slower than this (in ms) are logged with their SQL; 0 disables the log
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '0'))
+SLOW_REQUEST_MAX_STATEMENTS = 50
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+class Histogram:
+	def __init__(self, buckets):
+		self.buckets = tuple(buckets)
+		self.counts = [0] * (len(self.buckets) + 1)
+		self.sum = 0.0
+		self.count = 0
+
+	def observe(self, value: float) -> None:
+		self.counts[bisect_left(self.buckets, value)] += 1
+		self.sum += value
+		self.count += 1
+
+class RequestStats:
+	__slots__ = ("queries", "db_seconds", "statements")
+
+	def __init__(self, capture_statements: bool):
+		self.queries = 0
+		self.db_seconds = 0.0
+		self.statements = [] if capture_statements else None
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+class Registry:
+	"""In-process metric store rendered in the Prometheus text exposition format."""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self.latency: Dict[Tuple[str, str, str], Histogram] = {}
+		self.db_time: Dict[Tuple[str, str], Histogram] = {}
+		self.db_queries: Dict[Tuple[str, str], Histogram] = {}
+
+	def _histogram(self, family: dict, key: tuple, buckets) -> Histogram:
+		hist = family.get(key)
+		if hist is None:
+			with self._lock:
+				hist = family.setdefault(key, Histogram(buckets))
+		return hist
+
+	def record(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+		self._histogram(self.latency, (method, route, str(status)), LATENCY_BUCKETS).observe(seconds)
+		self._histogram(self.db_time, (method, route), LATENCY_BUCKETS).observe(stats.db_seconds)
+		self._histogram(self.db_queries, (method, route), QUERY_COUNT_BUCKETS).observe(stats.queries)
+
+	def render(self) -> str:
+		lines = []
+		families = (
+			("http_request_duration_seconds", "Request latency by route", ("method", "route", "status"), self.latency),
+			("http_request_db_seconds", "Time spent in database queries per request", ("method", "route"), self.db_time),
+			("http_request_db_queries", "Database queries issued per request", ("method", "route"), self.db_queries),
+		)
+		for name, help_text, label_names, family in families:
+			lines.append(f"# HELP {name} {help_text}")
+			lines.append(f"# TYPE {name} histogram")
+			for key, hist in sorted(family.items()):
+				labels = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(label_names, key))
+				cumulative = 0
+				for bound, count in zip(hist.buckets, hist.counts):
+					cumulative += count
+					lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+				lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+				lines.append(f"{name}_sum{{{labels}}} {hist.sum}")
+				lines.append(f"{name}_count{{{labels}}} {hist.count}")
+		return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+registry = Registry()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+	conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+	started = conn.info["query_started"].pop()
+	stats = _current.get()
+	if stats is None:
+		return
+	elapsed = time.perf_counter() - started
+	stats.queries += 1
+	stats.db_seconds += elapsed
+	if stats.statements is not None and len(stats.statements) < SLOW_REQUEST_MAX_STATEMENTS:
+		stats.statements.append((round(elapsed * 1000, 3), statement))
+
+def observe_commit(seconds: float) -> None:
+	"""Charge a COMMIT that ran outside the request (e.g. on the writer thread) to it."""
+	stats = _current.get()
+	if stats is None:
+		return
+	stats.queries += 1
+	stats.db_seconds += seconds
+	if stats.statements is not None and len(stats.statements) < SLOW_REQUEST_MAX_STATEMENTS:
+		stats.statements.append((round(seconds * 1000, 3), "COMMIT"))
+
+def instrument_engine(engine: Engine) -> None:
+	"""Count queries and database time for the request that issued them."""
+	event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+	event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+class MetricsMiddleware:
+	"""Pure ASGI middleware recording per-route latency and database usage."""
+
+	def __init__(self, app):
+		self.app = app
+
+	async def __call__(self, scope, receive, send):
+		if scope["type"] != "http":
+			return await self.app(scope, receive, send)
+
+		stats = RequestStats(capture_statements=SLOW_REQUEST_MS > 0)
+		token = _current.set(stats)
+		status_code = 500
+		started = time.perf_counter()
+
+		async def send_wrapper(message):
+			nonlocal status_code
+			if message["type"] == "http.response.start":
+				status_code = message["status"]
+			await send(message)
+
+		try:
+			await self.app(scope, receive, send_wrapper)
+		finally:
+			elapsed = time.perf_counter() - started
+			_current.reset(token)
+			# Label by route template, not the raw path, to keep cardinality bounded
+			route = getattr(scope.get("route"), "path", "unmatched")
+			registry.record(scope["method"], route, status_code, elapsed, stats)
+			if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+				logger.warning(
+					"Slow request %s %s: %.1f ms, %d queries, %.1f ms in database\n%s",
+					scope["method"], scope["path"], elapsed * 1000, stats.queries, stats.db_seconds * 1000,
+					"\n".join(f"  [{ms} ms] {sql}" for ms, sql in stats.statements),
+				)
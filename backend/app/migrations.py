@@ -0,0 +1,142 @@
+from datetime import date
+from typing import List, Optional
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from .database import Base
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+from .factors import seed_factor_sets
+from .ranking import distribution
+from .rollups import rebuild_rollups
+
+MIGRATION_BATCH_SIZE = 5000
+
+def normalize_log_date(value) -> Optional[str]:
+	"""Best-effort conversion of a legacy free-form date string to ISO format."""
+	if value is None:
+		return None
+	if isinstance(value, date):
+		return value.isoformat()
+	candidate = str(value).strip()[:10].replace("/", "-")
+	try:
+		return date.fromisoformat(candidate).isoformat()
+	except ValueError:
+		return None
+
+def _index_names(engine: Engine, table: str) -> set:
+	return {ix["name"] for ix in inspect(engine).get_indexes(table)}
+
+def _add_log_legacy_date(engine: Engine) -> Optional[str]:
+	columns = {c["name"] for c in inspect(engine).get_columns("logs")}
+	if "legacy_date" in columns:
+		return None
+	with engine.begin() as conn:
+		conn.execute(text("ALTER TABLE logs ADD COLUMN legacy_date TEXT NULL"))
+	return "logs.legacy_date added"
+
+def _migrate_log_dates(engine: Engine) -> Optional[str]:
+	# The composite index is created last, so its presence marks the
+	# migration as done (fresh databases get it straight from create_all).
+	if "ix_logs_user_id_date" in _index_names(engine, "logs"):
+		return None
+
+	converted = kept = 0
+	last_id = 0
+	while True:
+		with engine.begin() as conn:
+			rows = conn.execute(
+				text("SELECT id, date FROM logs WHERE id > :last_id ORDER BY id LIMIT :limit"),
+				{"last_id": last_id, "limit": MIGRATION_BATCH_SIZE},
+			).all()
+			if not rows:
+				break
+			last_id = rows[-1][0]
+			changes = []
+			for row_id, value in rows:
+				normalized = normalize_log_date(value)
+				legacy = None
+				if normalized is None and value is not None:
+					# Not a date we can read; keep the text so nothing is lost
+					legacy = str(value)
+					kept += 1
+				if normalized != value:
+					changes.append({"id": row_id, "date": normalized, "legacy_date": legacy})
+			if changes:
+				conn.execute(text("UPDATE logs SET date = :date, legacy_date = :legacy_date WHERE id = :id"), changes)
+				converted += len(changes)
+
+	with engine.begin() as conn:
+		dialect = engine.dialect.name
+		# SQLite has no native DATE storage; ISO text is what SQLAlchemy's Date expects there
+		if dialect == "mysql":
+			conn.execute(text("ALTER TABLE logs MODIFY COLUMN date DATE NULL"))
+		elif dialect == "postgresql":
+			conn.execute(text("ALTER TABLE logs ALTER COLUMN date TYPE DATE USING date::date"))
+		if "ix_logs_date" in _index_names(engine, "logs"):
+			conn.execute(text("DROP INDEX ix_logs_date ON logs" if dialect == "mysql" else "DROP INDEX ix_logs_date"))
+		conn.execute(text("CREATE INDEX ix_logs_user_id_date ON logs (user_id, date)"))
+	message = f"logs.date converted to DATE ({converted} rows rewritten)"
+	if kept:
+		message += f"; {kept} unparseable date(s) moved to logs.legacy_date, find them with: SELECT id, legacy_date FROM logs WHERE legacy_date IS NOT NULL"
+	return message
+
+def _add_log_factor_version(engine: Engine) -> Optional[str]:
+	columns = {c["name"] for c in inspect(engine).get_columns("logs")}
+	if "factor_version" in columns:
+		return None
+	with engine.begin() as conn:
+		conn.execute(text("ALTER TABLE logs ADD COLUMN factor_version INTEGER NULL"))
+	return "logs.factor_version added"
+
+def _add_user_logs_version(engine: Engine) -> Optional[str]:
+	columns = {c["name"] for c in inspect(engine).get_columns("users")}
+	if "logs_version" in columns:
+		return None
+	with engine.begin() as conn:
+		conn.execute(text("ALTER TABLE users ADD COLUMN logs_version INTEGER NOT NULL DEFAULT 0"))
+	return "users.logs_version added"
+
+def _add_sketch_generation(engine: Engine) -> Optional[str]:
+	columns = {c["name"] for c in inspect(engine).get_columns("score_sketches")}
+	if "generation" in columns:
+		return None
+	with engine.begin() as conn:
+		conn.execute(text("ALTER TABLE score_sketches ADD COLUMN generation INTEGER NOT NULL DEFAULT 0"))
+	return "score_sketches.generation added"
+
+def _seed_factor_sets(engine: Engine) -> Optional[str]:
+	with Session(engine) as db:
+		if seed_factor_sets(db):
+			return "emission_factor_sets seeded with the built-in factors as version 1"
+	return None
+
+def _backfill_rollups(engine: Engine) -> Optional[str]:
+	with Session(engine) as db:
+		users = rebuild_rollups(db)
+	return f"log_rollups backfilled for {users} user(s)"
+
+def _backfill_score_sketch(engine: Engine) -> Optional[str]:
+	with Session(engine) as db:
+		count = distribution.rebuild(db)
+	return f"score_sketches backfilled from {count} log(s)"
+
+def migrate(engine: Engine) -> List[str]:
+	"""Create missing tables and bring existing ones up to the current models."""
+	existing = set(inspect(engine).get_table_names())
+	Base.metadata.create_all(bind=engine)
+	steps = [_add_log_legacy_date, _migrate_log_dates, _add_log_factor_version] if "logs" in existing else []
+	if "users" in existing:
+		steps.insert(0, _add_user_logs_version)
+	if "logs" in existing and "log_rollups" not in existing:
+		steps.append(_backfill_rollups)
+	if "score_sketches" in existing:
+		steps.append(_add_sketch_generation)
+	elif "logs" in existing:
+		steps.append(_backfill_score_sketch)
+	steps.append(_seed_factor_sets)
+	applied = []
+	for step in steps:
+		message = step(engine)
+		if message:
+			applied.append(message)
+	return applied
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, ForeignKey, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -9,6 +10,7 @@ class User(Base):
 	username = Column(String(100), unique=True, index=True, nullable=False)
 	hashed_password = Column(String(255), nullable=False)
 	is_active = Column(Boolean, default=True)
+	logs_version = Column(Integer, default=0, nullable=False)  # bumped with every change to the user's logs; drives ETags
 	
 	logs = relationship("Log", back_populates="user")
 
@@ -16,7 +18,8 @@ class Log(Base):
 	__tablename__ = 'logs'
 	id = Column(Integer, primary_key=True, index=True)
 	user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-	date = Column(String(50), index=True)
+	date = Column(Date)
+	legacy_date = Column(Text, nullable=True)  # original text of a pre-DATE value that could not be parsed
 	travel_km = Column(Float, default=0)
 	travel_mode = Column(String(50), default='car')
 	electricity_kwh = Column(Float, default=0)
@@ -25,5 +28,54 @@ class Log(Base):
 	electricity_kg = Column(Float, default=0)
 	food_kg = Column(Float, default=0)
 	total_kg = Column(Float, default=0)
+	factor_version = Column(Integer, nullable=True)  # NULL: computed before factor sets were versioned
 	
 	user = relationship("User", back_populates="logs")
+	
+	__table_args__ = (
+		# Every log query filters by user first, then optionally by date range
+		Index('ix_logs_user_id_date', 'user_id', 'date'),
+	)
+
+class LogRollup(Base):
+	__tablename__ = 'log_rollups'
+	id = Column(Integer, primary_key=True)
+	user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+	granularity = Column(String(10), nullable=False)  # 'day', 'week' or 'month'
+	period = Column(String(10), nullable=False)  # ISO date the period starts on
+	travel_kg = Column(Float, default=0, nullable=False)
+	electricity_kg = Column(Float, default=0, nullable=False)
+	food_kg = Column(Float, default=0, nullable=False)
+	total_kg = Column(Float, default=0, nullable=False)
+	count = Column(Integer, default=0, nullable=False)
+	
+	__table_args__ = (
+		UniqueConstraint('user_id', 'granularity', 'period', name='uq_log_rollups_user_period'),
+	)
+
+class EmissionFactorSet(Base):
+	__tablename__ = 'emission_factor_sets'
+	version = Column(Integer, primary_key=True)
+	factors = Column(Text, nullable=False)  # JSON, same shape as logic.EMISSION_FACTORS
+	note = Column(String(255))
+	created_at = Column(DateTime, default=datetime.utcnow)
+
+class RecomputeJob(Base):
+	__tablename__ = 'recompute_jobs'
+	id = Column(Integer, primary_key=True)
+	target_version = Column(Integer, nullable=False)
+	status = Column(String(20), default='pending', nullable=False)  # pending, running, done, failed
+	last_log_id = Column(Integer, default=0, nullable=False)  # keyset cursor, so a job can resume
+	processed = Column(Integer, default=0, nullable=False)
+	updated = Column(Integer, default=0, nullable=False)
+	total = Column(Integer, default=0, nullable=False)
+	error = Column(Text)
+	created_at = Column(DateTime, default=datetime.utcnow)
+	updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ScoreSketch(Base):
+	__tablename__ = 'score_sketches'
+	name = Column(String(50), primary_key=True)
+	data = Column(Text, nullable=False)  # JSON, sketch.QuantileSketch.to_dict()
+	generation = Column(Integer, default=0, nullable=False)  # bumped by every full rebuild
+	updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+from functools import lru_cache
+from typing import List, Tuple, Type
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+JSON_TYPES = ("application/json",)
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines")
+CSV_TYPES = ("text/csv", "application/csv")
+
+def media_type(request: Request) -> str:
+	return request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+
+def _located(errors, prefix: Tuple) -> list:
+	return [{**err, "loc": prefix + tuple(err["loc"])} for err in errors]
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+	return TypeAdapter(List[model])
+
+def _unsupported(kind: str) -> RequestValidationError:
+	return RequestValidationError([{
+		"type": "content_type",
+		"loc": ("header", "content-type"),
+		"msg": f"Unsupported content type '{kind}'",
+		"input": kind,
+	}])
+
+def _row_errors(exc: ValidationError) -> list:
+	return [
+		{"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]}
+		for err in exc.errors(include_url=False)
+	]
+
+def iter_ndjson(body: bytes):
+	"""Yield every non-blank line of an NDJSON body."""
+	for line in body.splitlines():
+		if line.strip():
+			yield line
+
+async def parse_items(request: Request, model: Type[BaseModel]) -> List[BaseModel]:
+	"""Parse a JSON array or NDJSON body into model instances, failing as a whole with 422."""
+	body = await request.body()
+	kind = media_type(request)
+	if kind in NDJSON_TYPES:
+		items, errors = [], []
+		for index, line in enumerate(iter_ndjson(body)):
+			try:
+				items.append(model.model_validate_json(line))
+			except ValidationError as exc:
+				errors.extend(_located(exc.errors(include_url=False), ("body", index)))
+		if errors:
+			raise RequestValidationError(errors)
+		return items
+	if kind in JSON_TYPES:
+		try:
+			return _list_adapter(model).validate_json(body)
+		except ValidationError as exc:
+			raise RequestValidationError(_located(exc.errors(include_url=False), ("body",)))
+	raise _unsupported(kind)
+
+async def parse_rows(request: Request, model: Type[BaseModel]) -> Tuple[List[Tuple[int, BaseModel]], List[dict]]:
+	"""Parse a JSON array, NDJSON or CSV body row by row.
+
+	Returns the valid rows as (row_index, instance) pairs and a list of
+	{"row", "errors"} entries for the rows that failed validation, so one bad
+	record does not reject the whole upload.
+	"""
+	body = await request.body()
+	kind = media_type(request)
+	if kind in NDJSON_TYPES:
+		records = ((line, model.model_validate_json) for line in iter_ndjson(body))
+	elif kind in CSV_TYPES:
+		try:
+			text = body.decode("utf-8-sig")
+		except UnicodeDecodeError as exc:
+			raise RequestValidationError([{
+				"type": "csv_invalid", "loc": ("body",), "msg": f"Invalid CSV: {exc}", "input": None,
+			}])
+		reader = csv.DictReader(io.StringIO(text))
+		records = ((row, model.model_validate) for row in reader)
+	elif kind in JSON_TYPES:
+		try:
+			data = json.loads(body)
+		except ValueError as exc:
+			raise RequestValidationError([{
+				"type": "json_invalid", "loc": ("body",), "msg": f"Invalid JSON: {exc}", "input": None,
+			}])
+		if not isinstance(data, list):
+			raise RequestValidationError([{
+				"type": "list_type", "loc": ("body",), "msg": "Input should be a valid list", "input": None,
+			}])
+		records = ((row, model.model_validate) for row in data)
+	else:
+		raise _unsupported(kind)
+
+	items, errors = [], []
+	for index, (record, validate) in enumerate(records):
+		try:
+			items.append((index, validate(record)))
+		except ValidationError as exc:
+			errors.append({"row": index, "errors": _row_errors(exc)})
+	return items, errors
+
+def batch_openapi(model: Type[BaseModel], with_csv: bool = False) -> dict:
+	"""openapi_extra documenting a body accepted as JSON array or NDJSON (and optionally CSV)."""
+	name = model.__name__
+	extra = {
+		"requestBody": {
+			"required": True,
+			"content": {
+				"application/json": {
+					"schema": {"type": "array", "items": {"$ref": f"#/components/schemas/{name}"}},
+				},
+				"application/x-ndjson": {
+					"schema": {"$ref": f"#/components/schemas/{name}"},
+				},
+			},
+		},
+	}
+	if with_csv:
+		extra["requestBody"]["content"]["text/csv"] = {
+			"schema": {"type": "string", "description": f"Header row with the {name} field names"},
+		}
+	return extra
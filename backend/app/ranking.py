@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from .models import Log, ScoreSketch
+from .sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+# How often a worker merges its local changes into the stored sketch and
+# picks up everyone else's
+RANK_SYNC_INTERVAL = float(os.getenv('RANK_SYNC_INTERVAL', '30'))
+RANK_ACCURACY = 0.01
+RANK_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+class ScoreDistribution:
+	"""Population distribution of daily footprints (total_kg per log) as a quantile sketch.
+
+	Every worker counts its own writes in a pending delta and periodically
+	merges it into the shared row in `score_sketches`, so workers never
+	overwrite each other's counts and reads never scan the logs table. A
+	rebuild bumps the row's generation; a worker that sees a new generation
+	drops its pending delta instead of merging it, since the rebuild's scan
+	already counted those logs.
+	"""
+
+	def __init__(self, name: str = "daily_total_kg", sync_interval: float = RANK_SYNC_INTERVAL):
+		self.name = name
+		self.sync_interval = sync_interval
+		self._lock = threading.Lock()
+		self._sync_lock = threading.Lock()
+		self._stored = QuantileSketch(RANK_ACCURACY)
+		self._pending = QuantileSketch(RANK_ACCURACY)
+		self._snapshot: Optional[QuantileSketch] = None
+		self._synced_at: Optional[float] = None
+		self._generation: Optional[int] = None
+
+	def observe(self, added: Iterable[float] = (), removed: Iterable[float] = ()) -> None:
+		"""Record committed log totals; `removed` takes back values that were replaced."""
+		with self._lock:
+			self._pending.add(added)
+			self._pending.add(removed, weight=-1)
+			self._snapshot = None
+
+	def snapshot(self) -> QuantileSketch:
+		"""Stored sketch plus this worker's pending changes; treat as read-only."""
+		with self._lock:
+			if self._snapshot is None:
+				snapshot = self._stored.copy()
+				snapshot.merge(self._pending)
+				self._snapshot = snapshot
+			return self._snapshot
+
+	def _write(self, db: Session, sketch: QuantileSketch, row: Optional[ScoreSketch], generation: int) -> None:
+		data = json.dumps(sketch.to_dict())
+		if row is None:
+			db.add(ScoreSketch(name=self.name, data=data, generation=generation))
+		else:
+			row.data = data
+			row.generation = generation
+
+	def _settle(self, stored: QuantileSketch, flushed: QuantileSketch, generation: int) -> None:
+		# The flushed delta is now part of the stored sketch; swap both under
+		# one lock so readers never see it counted twice or not at all
+		with self._lock:
+			self._stored = stored
+			self._pending.merge(flushed, weight=-1)
+			self._snapshot = None
+			self._synced_at = time.monotonic()
+			self._generation = generation
+
+	def _merge(self, db: Session, flushed: QuantileSketch) -> Tuple[QuantileSketch, int]:
+		"""Fold a pending delta into the stored row in the caller's transaction; returns the new sketch and its generation."""
+		row = db.execute(
+			select(ScoreSketch).where(ScoreSketch.name == self.name).with_for_update()
+		).scalars().first()
+		stored = QuantileSketch.from_dict(json.loads(row.data)) if row else QuantileSketch(RANK_ACCURACY)
+		generation = (row.generation or 0) if row else 0
+		# After a rebuild elsewhere the pending values are already in the stored sketch
+		rebuilt = self._generation is not None and generation != self._generation
+		if not rebuilt and (flushed.bins or flushed.zero_count or flushed.count):
+			stored.merge(flushed)
+			self._write(db, stored, row, generation)
+		return stored, generation
+
+	def sync(self, db: Session, blocking: bool = True) -> bool:
+		"""Merge pending changes into the stored sketch and reload it.
+
+		With blocking=False, returns False right away if another sync is in
+		progress. Async callers (run_sync) must not block: the sync holding
+		the lock may be waiting on the same event loop thread.
+		"""
+		if not self._sync_lock.acquire(blocking):
+			return False
+		try:
+			with self._lock:
+				flushed = self._pending.copy()
+			stored, generation = self._merge(db, flushed)
+			db.commit()
+			self._settle(stored, flushed, generation)
+			return True
+		finally:
+			self._sync_lock.release()
+
+	def _due(self) -> bool:
+		return self._synced_at is None or time.monotonic() - self._synced_at >= self.sync_interval
+
+	def maybe_sync(self, db: Session) -> None:
+		"""Sync if the interval has passed; never fails the caller's request."""
+		if not self._due():
+			return
+		try:
+			self.sync(db, blocking=False)
+		except SQLAlchemyError:
+			db.rollback()
+			logger.warning("Could not sync the %s sketch", self.name, exc_info=True)
+
+	async def maybe_sync_queued(self, write_queue) -> None:
+		"""maybe_sync through the single SQLite writer instead of a connection of its own."""
+		if not self._due() or not self._sync_lock.acquire(False):
+			return
+		try:
+			with self._lock:
+				flushed = self._pending.copy()
+			stored, generation = await write_queue.run(self._merge, flushed)
+			self._settle(stored, flushed, generation)
+		except SQLAlchemyError:
+			logger.warning("Could not sync the %s sketch", self.name, exc_info=True)
+		finally:
+			self._sync_lock.release()
+
+	def rebuild(self, db: Session, batch_size: int = 5000) -> int:
+		"""Recompute the sketch from the logs table (one full scan) and store it."""
+		with self._sync_lock:
+			with self._lock:
+				# Pending values are already committed, so the scan covers them;
+				# other workers learn the same from the new generation
+				flushed = self._pending.copy()
+			sketch = QuantileSketch(RANK_ACCURACY)
+			rows = db.execute(
+				select(Log.total_kg).where(Log.total_kg.is_not(None)).execution_options(yield_per=batch_size)
+			)
+			for partition in rows.scalars().partitions():
+				sketch.add(partition)
+			row = db.execute(select(ScoreSketch).where(ScoreSketch.name == self.name).with_for_update()).scalars().first()
+			generation = (row.generation or 0) + 1 if row else 1
+			self._write(db, sketch, row, generation)
+			db.commit()
+			self._settle(sketch, flushed, generation)
+			return sketch.count
+
+distribution = ScoreDistribution()
@@ -0,0 +1,124 @@
+import logging
+from typing import Callable, Optional
+from sqlalchemy import bindparam, func, or_, select, update
+from sqlalchemy.orm import Session
+from .database import SessionLocal
+from .factors import registry
+from .models import Log, RecomputeJob
+from .ranking import distribution
+from .rollups import apply_to_rollups
+
+logger = logging.getLogger(__name__)
+
+RECOMPUTE_CHUNK_SIZE = 1000
+
+def _stale(version: int):
+	return or_(Log.factor_version.is_(None), Log.factor_version != version)
+
+def start_recompute_job(db: Session, version: int) -> RecomputeJob:
+	total = db.execute(select(func.count()).select_from(Log).where(_stale(version))).scalar()
+	job = RecomputeJob(target_version=version, total=total)
+	db.add(job)
+	db.commit()
+	db.refresh(job)
+	return job
+
+def _recompute_chunk(db: Session, job: RecomputeJob, factors: dict, chunk_size: int) -> bool:
+	"""Re-derive one chunk of logs and advance the job cursor; False when nothing is left."""
+	import numpy as np
+	from .batch import calculate_emissions_batch
+	rows = db.execute(
+		select(
+			Log.id, Log.user_id, Log.date, Log.travel_km, Log.travel_mode, Log.electricity_kwh, Log.diet,
+			Log.travel_kg, Log.electricity_kg, Log.food_kg, Log.total_kg, Log.factor_version,
+		)
+		.where(Log.id > job.last_log_id, _stale(job.target_version))
+		.order_by(Log.id.asc())
+		.limit(chunk_size)
+	).all()
+	if not rows:
+		return False
+
+	n = len(rows)
+	travel_kg, electricity_kg, food_kg, total_kg = calculate_emissions_batch(
+		np.fromiter((r.travel_km or 0 for r in rows), dtype=float, count=n),
+		[r.travel_mode for r in rows],
+		np.fromiter((r.electricity_kwh or 0 for r in rows), dtype=float, count=n),
+		[r.diet for r in rows],
+		factors,
+	)
+	# Each row is written only if it still carries the version it was read
+	# with, so a concurrent job (or a second run of this one) that got there
+	# first is not applied to the rollups twice.
+	unchanged, changed = [], []
+	for r, t, e, f, tot in zip(rows, travel_kg.tolist(), electricity_kg.tolist(), food_kg.tolist(), total_kg.tolist()):
+		values = {
+			"b_id": r.id, "b_read_version": r.factor_version,
+			"travel_kg": t, "electricity_kg": e, "food_kg": f, "total_kg": tot,
+			"factor_version": job.target_version,
+		}
+		if (t, e, f, tot) == (r.travel_kg, r.electricity_kg, r.food_kg, r.total_kg):
+			unchanged.append(values)
+		else:
+			changed.append((r, values))
+
+	stmt = update(Log.__table__).where(
+		Log.id == bindparam("b_id"),
+		Log.factor_version.is_not_distinct_from(bindparam("b_read_version")),
+	)
+	if unchanged:
+		db.execute(stmt, unchanged)
+	deltas, replaced = [], []
+	for r, values in changed:
+		# Row by row, since only rows this update actually claimed may move the rollups
+		if not db.execute(stmt, values).rowcount:
+			continue
+		deltas.append((
+			r.user_id, r.date,
+			values["travel_kg"] - (r.travel_kg or 0), values["electricity_kg"] - (r.electricity_kg or 0),
+			values["food_kg"] - (r.food_kg or 0), values["total_kg"] - (r.total_kg or 0),
+			0,
+		))
+		replaced.append((r.total_kg, values["total_kg"]))
+	apply_to_rollups(db, deltas)
+	job.last_log_id = rows[-1].id
+	job.processed += n
+	job.updated += len(deltas)
+	db.commit()
+	distribution.observe(
+		added=[new for _, new in replaced],
+		removed=[old for old, _ in replaced if old is not None],
+	)
+	return True
+
+def run_recompute_job(
+	job_id: int,
+	chunk_size: int = RECOMPUTE_CHUNK_SIZE,
+	session_factory: Callable[[], Session] = SessionLocal,
+	on_progress: Optional[Callable[[RecomputeJob], None]] = None,
+) -> Optional[RecomputeJob]:
+	"""Run (or resume) a recompute job in bounded chunks, one transaction per chunk."""
+	with session_factory() as db:
+		job = db.get(RecomputeJob, job_id)
+		if job is None or job.status == 'done':
+			return job
+		factor_set = registry.get(db, job.target_version)
+		if factor_set is None:
+			job.status, job.error = 'failed', f"Unknown factor version {job.target_version}"
+			db.commit()
+			return job
+		job.status, job.error = 'running', None
+		db.commit()
+		try:
+			while _recompute_chunk(db, job, factor_set.factors, chunk_size):
+				if on_progress:
+					on_progress(job)
+			job.status = 'done'
+			db.commit()
+			distribution.maybe_sync(db)
+		except Exception as exc:
+			db.rollback()
+			logger.exception("Recompute job %s failed", job_id)
+			job.status, job.error = 'failed', str(exc)
+			db.commit()
+		return job
@@ -0,0 +1,127 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Iterable, Optional
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .models import Log, LogRollup, User
+
+GRANULARITIES = ("day", "week", "month")
+SUM_FIELDS = ("travel_kg", "electricity_kg", "food_kg", "total_kg", "count")
+
+def parse_period_date(value) -> Optional[date]:
+	if isinstance(value, date):
+		return value
+	try:
+		return date.fromisoformat(str(value)[:10])
+	except ValueError:
+		return None
+
+def period_start(day: date, granularity: str) -> date:
+	if granularity == "week":
+		return day - timedelta(days=day.weekday())
+	if granularity == "month":
+		return day.replace(day=1)
+	return day
+
+def _aggregate(entries: Iterable) -> dict:
+	"""Fold (user_id, date, travel_kg, electricity_kg, food_kg, total_kg, count) deltas per rollup key."""
+	totals = defaultdict(lambda: [0.0, 0.0, 0.0, 0.0, 0])
+	for user_id, value, *deltas in entries:
+		day = parse_period_date(value)
+		if day is None:
+			continue
+		for granularity in GRANULARITIES:
+			acc = totals[(user_id, granularity, period_start(day, granularity).isoformat())]
+			for i, delta in enumerate(deltas):
+				acc[i] += delta
+	return totals
+
+def bump_log_versions(db: Session, user_ids: Iterable[int]) -> None:
+	"""Advance users.logs_version in the caller's transaction, so every worker's ETags change."""
+	user_ids = sorted(set(user_ids))
+	if user_ids:
+		db.execute(
+			update(User).where(User.id.in_(user_ids)).values(logs_version=User.logs_version + 1),
+			execution_options={"synchronize_session": False},
+		)
+
+def apply_to_rollups(db: Session, entries: Iterable) -> None:
+	"""Add deltas to the rollup rows inside the caller's transaction.
+
+	Each entry is (user_id, date, travel_kg, electricity_kg, food_kg, total_kg, count);
+	negative deltas remove a log's contribution. Logs whose date is not an ISO
+	date are left out of the rollups. Every write to logs goes through here,
+	so it also bumps the users' logs_version.
+	"""
+	entries = list(entries)
+	bump_log_versions(db, (entry[0] for entry in entries))
+	for (user_id, granularity, period), deltas in _aggregate(entries).items():
+		key = (
+			(LogRollup.user_id == user_id)
+			& (LogRollup.granularity == granularity)
+			& (LogRollup.period == period)
+		)
+		increments = {
+			field: getattr(LogRollup, field) + delta
+			for field, delta in zip(SUM_FIELDS, deltas)
+		}
+		if db.execute(update(LogRollup).where(key).values(**increments)).rowcount:
+			continue
+		try:
+			with db.begin_nested():
+				db.execute(insert(LogRollup).values(
+					user_id=user_id, granularity=granularity, period=period,
+					**dict(zip(SUM_FIELDS, deltas)),
+				))
+		except IntegrityError:
+			# Another transaction created the row first
+			db.execute(update(LogRollup).where(key).values(**increments))
+
+def log_rollup_entry(log) -> tuple:
+	return (log.user_id, log.date, log.travel_kg, log.electricity_kg, log.food_kg, log.total_kg, 1)
+
+def user_totals(db: Session, user_id: int) -> dict:
+	"""All-time totals for a user, summed from the monthly rollups."""
+	row = db.execute(
+		select(*(func.coalesce(func.sum(getattr(LogRollup, field)), 0) for field in SUM_FIELDS))
+		.where(LogRollup.user_id == user_id, LogRollup.granularity == "month")
+	).one()
+	travel_kg, electricity_kg, food_kg, total_kg, count = row
+	return {
+		"days": int(count),
+		"travelKg": round(float(travel_kg), 2),
+		"electricityKg": round(float(electricity_kg), 2),
+		"foodKg": round(float(food_kg), 2),
+		"totalKg": round(float(total_kg), 2),
+		"averageKg": round(total_kg / count, 2) if count else None,
+	}
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None, batch_size: int = 1000) -> int:
+	"""Recompute rollups from raw logs, one user (and one commit) at a time."""
+	query = select(Log.user_id).distinct().order_by(Log.user_id)
+	if user_id is not None:
+		query = query.where(Log.user_id == user_id)
+	user_ids = db.execute(query).scalars().all()
+	if user_id is not None and user_id not in user_ids:
+		user_ids = [user_id]
+
+	for uid in user_ids:
+		db.execute(delete(LogRollup).where(LogRollup.user_id == uid))
+		rows = db.execute(
+			select(Log.user_id, Log.date, Log.travel_kg, Log.electricity_kg, Log.food_kg, Log.total_kg)
+			.where(Log.user_id == uid)
+			.execution_options(yield_per=batch_size)
+		)
+		totals = _aggregate((*row, 1) for row in rows)
+		if totals:
+			db.execute(insert(LogRollup), [
+				{
+					"user_id": key[0], "granularity": key[1], "period": key[2],
+					**dict(zip(SUM_FIELDS, deltas)),
+				}
+				for key, deltas in totals.items()
+			])
+		bump_log_versions(db, [uid])
+		db.commit()
+	return len(user_ids)
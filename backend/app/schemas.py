@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+import datetime
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Annotated, Any, Dict, List, Optional
 
 # User Schemas
 class UserCreate(BaseModel):
@@ -25,12 +26,16 @@ class Token(BaseModel):
 	token_type: str
 	user: UserResponse
 
+# Activity amounts must be finite and small enough that the derived kg
+# values stay finite too; the orjson fast path would send inf/NaN as null
+Amount = Annotated[float, Field(allow_inf_nan=False, ge=-1e300, le=1e300)]
+
 # Existing Schemas
 class ComputeRequest(BaseModel):
 	date: str
-	travelKm: float
+	travelKm: Amount
 	travelMode: str
-	electricityKwh: float
+	electricityKwh: Amount
 	diet: str
 
 class ComputeResponse(BaseModel):
@@ -41,7 +46,17 @@ class ComputeResponse(BaseModel):
 	ecoScore: int
 	tips: List[str]
 
+class ComputeBatchResponse(BaseModel):
+	items: List[ComputeResponse]
+
+class LogCreate(ComputeRequest):
+	date: datetime.date
+
 class LogEntry(ComputeRequest):
+	date: Optional[str]
+	# Stored values are rendered as they are, not re-validated as input
+	travelKm: float
+	electricityKwh: float
 	travelKg: float
 	electricityKg: float
 	foodKg: float
@@ -49,3 +64,153 @@ class LogEntry(ComputeRequest):
 
 class LogResponse(BaseModel):
 	items: List[LogEntry]
+	nextCursor: Optional[int] = None
+
+class BulkRowError(BaseModel):
+	row: int
+	errors: List[Any]
+
+class BulkImportResponse(BaseModel):
+	received: int
+	inserted: int
+	failed: int
+	errors: List[BulkRowError]
+	elapsedMs: float
+	rowsPerSecond: float
+
+class StatsPeriod(BaseModel):
+	period: str
+	travelKg: float
+	electricityKg: float
+	foodKg: float
+	totalKg: float
+	count: int
+
+class StatsResponse(BaseModel):
+	granularity: str
+	items: List[StatsPeriod]
+
+class EmissionFactors(BaseModel):
+	travelPerKmKg: Dict[str, float]
+	electricityPerKwhKg: float
+	foodPerDayKg: Dict[str, float]
+
+	# Unknown travel modes and diets fall back to these entries
+	@field_validator('travelPerKmKg')
+	@classmethod
+	def has_car(cls, v):
+		if 'car' not in v:
+			raise ValueError("travelPerKmKg must define 'car'")
+		return v
+
+	@field_validator('foodPerDayKg')
+	@classmethod
+	def has_mixed(cls, v):
+		if 'mixed' not in v:
+			raise ValueError("foodPerDayKg must define 'mixed'")
+		return v
+
+class FactorSetCreate(BaseModel):
+	factors: EmissionFactors
+	note: Optional[str] = None
+
+class FactorSetResponse(BaseModel):
+	version: int
+	factors: EmissionFactors
+
+class RecomputeJobResponse(BaseModel):
+	id: int
+	targetVersion: int
+	status: str
+	processed: int
+	updated: int
+	total: int
+	lastLogId: int
+	error: Optional[str] = None
+
+class RankQuantile(BaseModel):
+	quantile: float
+	totalKg: float
+	ecoScore: int
+
+class RankDistributionResponse(BaseModel):
+	population: int
+	averageKg: Optional[float] = None
+	relativeAccuracy: float
+	quantiles: List[RankQuantile]
+
+class RankResponse(BaseModel):
+	userId: int
+	days: int
+	averageKg: Optional[float] = None
+	ecoScore: Optional[int] = None
+	percentile: Optional[float] = None
+	population: int
+
+def _check_shift_km(v: float) -> float:
+	if v < 0:
+		raise ValueError("shiftKm must not be negative")
+	return v
+
+def _check_percent(v: float) -> float:
+	if not 0 <= v <= 100:
+		raise ValueError("electricityCutPercent must be between 0 and 100")
+	return v
+
+class SimulationScenario(BaseModel):
+	name: Optional[str] = None
+	# Kilometres per logged day moved from fromMode to toMode, capped at that day's distance
+	shiftKm: Amount = 0.0
+	fromMode: str = 'car'
+	toMode: str = 'train'
+	# Days with a higher food footprint than this diet switch to it
+	diet: Optional[str] = None
+	electricityCutPercent: Amount = 0.0
+
+	@field_validator('shiftKm')
+	@classmethod
+	def non_negative(cls, v):
+		return _check_shift_km(v)
+
+	@field_validator('electricityCutPercent')
+	@classmethod
+	def percentage(cls, v):
+		return _check_percent(v)
+
+class SimulationGrid(BaseModel):
+	"""Every combination of these values becomes a scenario."""
+	shiftKm: List[Amount] = [0.0]
+	fromMode: str = 'car'
+	toMode: str = 'train'
+	diet: List[Optional[str]] = [None]
+	electricityCutPercent: List[Amount] = [0.0]
+
+	@field_validator('shiftKm')
+	@classmethod
+	def non_negative(cls, v):
+		return [_check_shift_km(x) for x in v]
+
+	@field_validator('electricityCutPercent')
+	@classmethod
+	def percentage(cls, v):
+		return [_check_percent(x) for x in v]
+
+class SimulationRequest(BaseModel):
+	scenarios: List[SimulationScenario] = []
+	grid: Optional[SimulationGrid] = None
+
+class ScenarioResult(BaseModel):
+	scenario: SimulationScenario
+	projectedKg: float
+	savingsKg: float
+	savingsPercent: float
+	travelSavingsKg: float
+	electricitySavingsKg: float
+	foodSavingsKg: float
+
+class SimulationResponse(BaseModel):
+	userId: int
+	days: int
+	factorVersion: int
+	baselineKg: float
+	scenarios: List[ScenarioResult]
@@ -0,0 +1,81 @@
+import json
+import os
+import re
+from typing import Optional
+import orjson
+from fastapi.responses import Response
+from .models import Log
+
+# Encode hot JSON responses with orjson instead of validating them against
+# the response_model and running json.dumps. Read once at import; set
+# FAST_JSON=0 before starting the server to turn it off
+FAST_JSON = os.getenv('FAST_JSON', '1') == '1'
+
+# orjson and Python's float repr disagree only around exponent notation
+# (and orjson spells out values below 1e-4 that repr writes as 1e-05);
+# payloads containing either go through json.dumps so the bytes never change.
+# The pattern starts with a literal so re can skip ahead; a bare [0-9]e scan
+# costs more than the encoding it guards.
+_EXPONENT = re.compile(rb"e[-+0-9]")
+_DIGITS = frozenset(b"0123456789")
+
+def _float_mismatch(data: bytes) -> bool:
+	if b"0.0000" in data:
+		return True
+	return any(data[match.start() - 1] in _DIGITS for match in _EXPONENT.finditer(data, 1))
+
+# Columns needed to render a LogEntry; selecting these instead of Log keeps
+# list endpoints from materializing ORM objects.
+LOG_ENTRY_COLUMNS = (
+	Log.date, Log.travel_km, Log.travel_mode, Log.electricity_kwh, Log.diet,
+	Log.travel_kg, Log.electricity_kg, Log.food_kg, Log.total_kg,
+)
+
+def _float(value):
+	# What LogEntry's float fields would coerce the column value to
+	return None if value is None else float(value)
+
+def log_entry(l) -> dict:
+	"""Map a Log instance or a row selected with LOG_ENTRY_COLUMNS to a LogEntry dict."""
+	return {
+		"date": l.date.isoformat() if l.date is not None else None,
+		"travelKm": _float(l.travel_km),
+		"travelMode": l.travel_mode,
+		"electricityKwh": _float(l.electricity_kwh),
+		"diet": l.diet,
+		"travelKg": _float(l.travel_kg),
+		"electricityKg": _float(l.electricity_kg),
+		"foodKg": _float(l.food_kg),
+		"totalKg": _float(l.total_kg),
+	}
+
+def json_bytes(content) -> bytes:
+	"""Exactly what Starlette's JSONResponse renders."""
+	return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def fast_json_bytes(content) -> bytes:
+	"""Same bytes as json_bytes, encoded with orjson whenever that is safe."""
+	data = orjson.dumps(content)
+	if _float_mismatch(data):
+		return json_bytes(content)
+	return data
+
+class FastJSONResponse(Response):
+	media_type = "application/json"
+
+	def render(self, content) -> bytes:
+		return fast_json_bytes(content)
+
+def json_response(content, response: Optional[Response] = None):
+	"""Return content pre-encoded, skipping FastAPI's response_model round trip.
+
+	The route's response_model still documents the schema, so content must
+	already be exactly what that model would serialize to. Headers set on the
+	injected `response` are carried over.
+	"""
+	if not FAST_JSON:
+		return content
+	return FastJSONResponse(content, headers=dict(response.headers) if response is not None else None)
+
+def ndjson_lines(rows) -> bytes:
+	return b"".join(fast_json_bytes(log_entry(row)) + b"\n" for row in rows)
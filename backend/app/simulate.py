@@ -0,0 +1,113 @@
+import itertools
+import os
+from typing import List, Sequence
+import numpy as np
+from .batch import lookup_factors, round2
+from .schemas import SimulationRequest, SimulationScenario
+
+SIMULATE_MAX_SCENARIOS = int(os.getenv('SIMULATE_MAX_SCENARIOS', '1000'))
+# Upper bound on scenario x day cells evaluated at once, to cap memory use
+SIMULATE_CHUNK_CELLS = 1_000_000
+
+def expand_scenarios(request: SimulationRequest) -> List[SimulationScenario]:
+	"""Explicit scenarios followed by every combination in the grid."""
+	grid = request.grid
+	count = len(request.scenarios)
+	if grid is not None:
+		count += len(grid.shiftKm) * len(grid.diet) * len(grid.electricityCutPercent)
+	if not count:
+		raise ValueError("No scenarios given")
+	if count > SIMULATE_MAX_SCENARIOS:
+		raise ValueError(f"At most {SIMULATE_MAX_SCENARIOS} scenarios per request")
+	scenarios = list(request.scenarios)
+	if grid is not None:
+		for shift_km, diet, cut in itertools.product(grid.shiftKm, grid.diet, grid.electricityCutPercent):
+			scenarios.append(SimulationScenario(
+				shiftKm=shift_km, fromMode=grid.fromMode, toMode=grid.toMode, diet=diet, electricityCutPercent=cut,
+			))
+	return scenarios
+
+def _check_names(scenarios: Sequence[SimulationScenario], factors: dict) -> None:
+	# Unlike logged activities, a typo here should not silently fall back to car/mixed
+	modes = factors["travelPerKmKg"]
+	diets = factors["foodPerDayKg"]
+	for s in scenarios:
+		for mode in (s.fromMode, s.toMode):
+			if mode not in modes:
+				raise ValueError(f"Unknown travel mode '{mode}'")
+		if s.diet is not None and s.diet not in diets:
+			raise ValueError(f"Unknown diet '{s.diet}'")
+
+def simulate(rows, scenarios: Sequence[SimulationScenario], factors: dict) -> dict:
+	"""Project a user's history under each scenario with the given factor set.
+
+	`rows` are (travel_km, travel_mode, electricity_kwh, diet) tuples. The
+	baseline is the same history recomputed with these factors, so savings
+	reflect only the scenario. Every day is evaluated the way
+	calculate_emissions would (same per-day rounding), for all scenarios at
+	once as a scenarios x days array.
+	"""
+	_check_names(scenarios, factors)
+	travel_table = factors["travelPerKmKg"]
+	food_table = factors["foodPerDayKg"]
+	electricity_factor = factors["electricityPerKwhKg"]
+
+	n = len(rows)
+	travel_km, travel_mode, electricity_kwh, diet = zip(*rows) if n else ((), (), (), ())
+	# NULL distances and kWh count as zero
+	km = np.nan_to_num(np.array(travel_km, dtype=float))
+	kwh = np.nan_to_num(np.array(electricity_kwh, dtype=float))
+	modes = np.asarray(travel_mode, dtype=object)
+	mode_factor = lookup_factors(travel_mode, travel_table, travel_table["car"])
+	food = lookup_factors(diet, food_table, food_table["mixed"])
+
+	base_travel = round2(km * mode_factor)
+	base_electricity = round2(kwh * electricity_factor)
+	base_total = round2(base_travel + base_electricity + food)
+	baseline = {
+		"travel": float(base_travel.sum()),
+		"electricity": float(base_electricity.sum()),
+		"food": float(food.sum()),
+		"total": float(base_total.sum()),
+	}
+
+	# Scenario parameters as column vectors, broadcast against the days
+	shift_km = np.array([s.shiftKm for s in scenarios], dtype=float)[:, None]
+	cut = np.array([s.electricityCutPercent for s in scenarios], dtype=float)[:, None] / 100
+	to_factor = np.array([travel_table[s.toMode] for s in scenarios], dtype=float)[:, None]
+	diet_cap = np.array([food_table[s.diet] if s.diet is not None else np.inf for s in scenarios], dtype=float)[:, None]
+	# Days on each fromMode; one comparison per distinct mode, stacked per chunk
+	matches = {mode: modes == mode for mode in {s.fromMode for s in scenarios}}
+
+	results = []
+	chunk = max(1, SIMULATE_CHUNK_CELLS // max(n, 1))
+	for start in range(0, len(scenarios), chunk):
+		part = slice(start, start + chunk)
+		shape = (len(scenarios[part]), n)
+		on_from_mode = np.array([matches[s.fromMode] for s in scenarios[part]], dtype=bool).reshape(shape)
+		moved = np.where(on_from_mode, np.minimum(km, shift_km[part]), 0.0)
+		travel = round2(((km - moved) * mode_factor + moved * to_factor[part]).ravel()).reshape(shape)
+		electricity = round2((kwh * (1 - cut[part])).ravel() * electricity_factor).reshape(shape)
+		diet_food = np.minimum(food, diet_cap[part])
+		total = round2((travel + electricity + diet_food).ravel()).reshape(shape)
+		results.extend(zip(
+			scenarios[part], total.sum(axis=1).tolist(), travel.sum(axis=1).tolist(),
+			electricity.sum(axis=1).tolist(), diet_food.sum(axis=1).tolist(),
+		))
+
+	return {
+		"days": n,
+		"baselineKg": round(baseline["total"], 2),
+		"scenarios": [
+			{
+				"scenario": scenario,
+				"projectedKg": round(total, 2),
+				"savingsKg": round(baseline["total"] - total, 2),
+				"savingsPercent": round((baseline["total"] - total) / baseline["total"] * 100, 2) if baseline["total"] else 0.0,
+				"travelSavingsKg": round(baseline["travel"] - travel, 2),
+				"electricitySavingsKg": round(baseline["electricity"] - electricity, 2),
+				"foodSavingsKg": round(baseline["food"] - food_kg, 2),
+			}
+			for scenario, total, travel, electricity, food_kg in results
+		],
+	}
@@ -0,0 +1,119 @@
+import math
+from typing import Dict, Iterable, Optional, Tuple
+
+# Values below this count as zero; daily footprints are reported to 0.01 kg
+MIN_TRACKED_VALUE = 1e-3
+
+class QuantileSketch:
+	"""Mergeable quantile sketch with a relative error bound (DDSketch).
+
+	Values are counted in logarithmically sized buckets, so every quantile is
+	within `relative_accuracy` of the exact answer and the size depends only
+	on the range of values, never on how many were added. Because the state
+	is just bucket counts, sketches merge by addition and values can be
+	removed again by subtracting them.
+	"""
+
+	def __init__(self, relative_accuracy: float = 0.01):
+		self.relative_accuracy = relative_accuracy
+		self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+		self._log_gamma = math.log(self.gamma)
+		self.bins: Dict[int, int] = {}
+		self.zero_count = 0
+		self.count = 0
+		self.sum = 0.0
+		self._cumulative: Optional[Tuple] = None
+
+	def _key(self, value: float) -> int:
+		return math.ceil(math.log(value) / self._log_gamma)
+
+	def _value(self, key: int) -> float:
+		# Bucket k holds (gamma^(k-1), gamma^k]; this point is within the error bound of both ends
+		return 2 * self.gamma ** key / (self.gamma + 1)
+
+	def add(self, values: Iterable[float], weight: int = 1) -> None:
+		"""Add values (or remove them again with weight=-1)."""
+		import numpy as np
+		values = np.fromiter(values, dtype=float)
+		if not values.size:
+			return
+		tracked = values >= MIN_TRACKED_VALUE
+		self.zero_count += weight * int(values.size - np.count_nonzero(tracked))
+		keys, counts = np.unique(np.ceil(np.log(values[tracked]) / self._log_gamma).astype(np.int64), return_counts=True)
+		for key, count in zip(keys.tolist(), counts.tolist()):
+			self._bump(key, weight * count)
+		self.count += weight * int(values.size)
+		self.sum += weight * float(values.sum())
+		self._cumulative = None
+
+	def _bump(self, key: int, delta: int) -> None:
+		count = self.bins.get(key, 0) + delta
+		if count:
+			self.bins[key] = count
+		else:
+			self.bins.pop(key, None)
+
+	def merge(self, other: "QuantileSketch", weight: int = 1) -> None:
+		if other.relative_accuracy != self.relative_accuracy:
+			raise ValueError("Cannot merge sketches with different accuracy")
+		for key, count in other.bins.items():
+			self._bump(key, weight * count)
+		self.zero_count += weight * other.zero_count
+		self.count += weight * other.count
+		self.sum += weight * other.sum
+		self._cumulative = None
+
+	def copy(self) -> "QuantileSketch":
+		clone = QuantileSketch(self.relative_accuracy)
+		clone.merge(self)
+		return clone
+
+	def _buckets(self) -> Tuple:
+		# numpy is imported on first use so loading the app stays cheap
+		import numpy as np
+		if self._cumulative is None:
+			keys = np.array(sorted(self.bins), dtype=np.int64)
+			counts = np.array([self.bins[k] for k in keys.tolist()], dtype=np.int64)
+			self._cumulative = (keys, self.zero_count + np.cumsum(counts))
+		return self._cumulative
+
+	def quantile(self, q: float) -> Optional[float]:
+		if self.count <= 0:
+			return None
+		rank = q * (self.count - 1)
+		if rank < self.zero_count:
+			return 0.0
+		keys, cumulative = self._buckets()
+		index = min(int(cumulative.searchsorted(rank, side="right")), len(keys) - 1)
+		return self._value(int(keys[index]))
+
+	def cdf(self, value: float) -> Optional[float]:
+		"""Approximate fraction of values below `value` (ties count half)."""
+		if self.count <= 0:
+			return None
+		if value < MIN_TRACKED_VALUE:
+			return self.zero_count / 2 / self.count
+		keys, cumulative = self._buckets()
+		key = self._key(value)
+		index = int(keys.searchsorted(key, side="left"))
+		below = cumulative[index - 1] if index else self.zero_count
+		in_bucket = self.bins.get(key, 0)
+		return float(below + in_bucket / 2) / self.count
+
+	def to_dict(self) -> dict:
+		return {
+			"relative_accuracy": self.relative_accuracy,
+			"zero_count": self.zero_count,
+			"count": self.count,
+			"sum": self.sum,
+			"bins": {str(k): c for k, c in self.bins.items()},
+		}
+
+	@classmethod
+	def from_dict(cls, data: dict) -> "QuantileSketch":
+		sketch = cls(data["relative_accuracy"])
+		sketch.bins = {int(k): c for k, c in data["bins"].items()}
+		sketch.zero_count = data["zero_count"]
+		sketch.count = data["count"]
+		sketch.sum = data["sum"]
+		return sketch
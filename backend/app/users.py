@@ -0,0 +1,97 @@
+import hashlib
+import os
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .cache import TTLCache
+from .models import User
+
+# is_active per user id, so user-scoped endpoints skip the existence query.
+# Ids with no user are cached too, for a shorter time. Register and
+# deactivation update this process's cache; other workers catch up within
+# the TTL.
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '60'))
+USER_CACHE_NEGATIVE_TTL = float(os.getenv('USER_CACHE_NEGATIVE_TTL', '5'))
+
+# users.logs_version per user id, which log and stats ETags are built from.
+# Writes in this process drop the entry; changes made by other workers or
+# offline scripts are picked up within LOG_VERSION_TTL seconds.
+LOG_VERSION_TTL = float(os.getenv('LOG_VERSION_TTL', '2'))
+
+_MISSING = object()
+
+class UserCache:
+	"""Bounded id -> active flag cache; None marks an id with no user."""
+
+	def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL, negative_ttl: float = USER_CACHE_NEGATIVE_TTL):
+		self.negative_ttl = negative_ttl
+		self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+	async def status(self, db: AsyncSession, user_id: int) -> Optional[bool]:
+		active = self._cache.get(user_id, _MISSING)
+		if active is _MISSING:
+			row = (await db.execute(select(User.is_active).where(User.id == user_id))).first()
+			# Rows from before the column had a default count as active
+			active = None if row is None else row.is_active is not False
+			self.set(user_id, active)
+		return active
+
+	def set(self, user_id: int, active: Optional[bool]) -> None:
+		self._cache.set(user_id, active, ttl=self.negative_ttl if active is None else None)
+
+	def invalidate(self, user_id: int) -> None:
+		self._cache.pop(user_id)
+
+	def clear(self) -> None:
+		self._cache.clear()
+
+user_cache = UserCache()
+
+def update_user(db: Session, user_id: int, values: dict) -> int:
+	"""Update one user's columns in the caller's transaction; returns the number of rows changed."""
+	return db.execute(update(User).where(User.id == user_id).values(**values)).rowcount
+
+def insert_user(db: Session, email: str, username: str, hashed_password: str) -> dict:
+	"""Add a user in the caller's transaction; raises IntegrityError if the email or username is taken."""
+	user = User(email=email, username=username, hashed_password=hashed_password, is_active=True)
+	db.add(user)
+	db.flush()
+	return {"id": user.id, "email": user.email, "username": user.username, "is_active": user.is_active}
+
+class LogVersions:
+	"""Short-lived cache of users.logs_version for building ETags."""
+
+	def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = LOG_VERSION_TTL):
+		self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+	async def etag(self, db: AsyncSession, user_id: int, variant: str = "") -> str:
+		version = self._cache.get(user_id)
+		if version is None:
+			version = (await db.execute(select(User.logs_version).where(User.id == user_id))).scalar() or 0
+			self._cache.set(user_id, version)
+		digest = hashlib.blake2s(variant.encode(), digest_size=6).hexdigest()
+		return f'W/"{version}-{digest}"'
+
+	def invalidate(self, user_id: int) -> None:
+		self._cache.pop(user_id)
+
+	def clear(self) -> None:
+		self._cache.clear()
+
+log_versions = LogVersions()
+
+async def require_active_user(db: AsyncSession, user_id: int) -> None:
+	active = await user_cache.status(db, user_id)
+	if active is None:
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="User not found"
+		)
+	if not active:
+		raise HTTPException(
+			status_code=status.HTTP_403_FORBIDDEN,
+			detail="User is deactivated"
+		)
@@ -0,0 +1,120 @@
+import asyncio
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+from sqlalchemy.orm import Session
+from .database import SQLITE_PRODUCTION, SessionLocal
+from .metrics import observe_commit
+
+logger = logging.getLogger(__name__)
+
+# Most writes folded into one transaction, and how long the writer waits for
+# more to arrive once it has one (0: take only what is already queued)
+WRITE_BATCH_MAX = int(os.getenv('WRITE_BATCH_MAX', '256'))
+WRITE_BATCH_WAIT_MS = float(os.getenv('WRITE_BATCH_WAIT_MS', '0'))
+
+_STOP = object()
+
+class WriteQueue:
+	"""Single writer for SQLite: jobs run on one connection and commit in groups.
+
+	SQLite allows one writer at a time, so concurrent request transactions
+	only take turns on the database lock (or fail with "database is locked").
+	Here a dedicated thread drains the queue, runs each queued job in its own
+	SAVEPOINT and commits the whole group at once; a failing job is rolled
+	back alone and the rest of the group still commits. Each job runs in a
+	copy of the submitting context, so per-request metrics still see its
+	queries, and the group's commit time is charged to every request in it.
+	"""
+
+	def __init__(self, session_factory: Callable[[], Session] = SessionLocal, batch_max: int = WRITE_BATCH_MAX, batch_wait: float = WRITE_BATCH_WAIT_MS / 1000):
+		self.session_factory = session_factory
+		self.batch_max = batch_max
+		self.batch_wait = batch_wait
+		self._queue: "queue.Queue" = queue.Queue()
+		self._thread: Optional[threading.Thread] = None
+		self._lock = threading.Lock()
+
+	def _start(self) -> None:
+		with self._lock:
+			if self._thread is None or not self._thread.is_alive():
+				self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+				self._thread.start()
+
+	def submit(self, fn: Callable[..., Any], *args) -> Future:
+		"""Queue fn(db, *args); the future resolves after the group containing it commits."""
+		future: Future = Future()
+		self._queue.put((fn, args, future, contextvars.copy_context()))
+		self._start()
+		return future
+
+	async def run(self, fn: Callable[..., Any], *args) -> Any:
+		return await asyncio.wrap_future(self.submit(fn, *args))
+
+	def close(self, timeout: Optional[float] = None) -> None:
+		"""Finish queued writes and stop the writer thread."""
+		if self._thread is not None and self._thread.is_alive():
+			self._queue.put(_STOP)
+			self._thread.join(timeout)
+
+	def _next_batch(self) -> list:
+		batch = [self._queue.get()]
+		while len(batch) < self.batch_max and batch[-1] is not _STOP:
+			try:
+				batch.append(self._queue.get(timeout=self.batch_wait) if self.batch_wait else self._queue.get_nowait())
+			except queue.Empty:
+				break
+		return batch
+
+	def _run(self) -> None:
+		with self.session_factory() as db:
+			while True:
+				batch = self._next_batch()
+				jobs = [job for job in batch if job is not _STOP]
+				if jobs:
+					self._commit_group(db, jobs)
+				if len(jobs) < len(batch):
+					return
+
+	def _commit_group(self, db: Session, jobs: list) -> None:
+		try:
+			# pysqlite would otherwise let the first SAVEPOINT open (and its
+			# RELEASE commit) a transaction per job; IMMEDIATE also takes the
+			# write lock up front instead of failing to upgrade a read lock
+			db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+		except Exception as exc:
+			db.rollback()
+			for _, _, future, _ in jobs:
+				if future.set_running_or_notify_cancel():
+					future.set_exception(exc)
+			return
+		done = []
+		for fn, args, future, ctx in jobs:
+			if not future.set_running_or_notify_cancel():
+				continue
+			try:
+				with db.begin_nested():
+					result = ctx.run(fn, db, *args)
+				done.append((future, result, ctx))
+			except Exception as exc:
+				future.set_exception(exc)
+		started = time.perf_counter()
+		try:
+			db.commit()
+		except Exception as exc:
+			db.rollback()
+			logger.exception("Group commit of %d write(s) failed", len(done))
+			for future, _, _ in done:
+				future.set_exception(exc)
+			return
+		elapsed = time.perf_counter() - started
+		for future, result, ctx in done:
+			ctx.run(observe_commit, elapsed)
+			future.set_result(result)
+
+write_queue = WriteQueue() if SQLITE_PRODUCTION else None
@@ -0,0 +1,110 @@
+"""
+Shared helpers for the benchmark suite: an offline SQLite environment,
+timing/percentile utilities and baseline comparison.
+"""
+
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Metrics compared against the baseline: throughputs (higher is better)
+# and latency percentiles (lower is better)
+HIGHER_IS_BETTER = ("ops_per_sec", "rows_per_sec", "rps")
+LOWER_IS_BETTER = ("p50_", "p95_", "p99_")
+
+
+def use_offline_database():
+    """Point the app at a throwaway SQLite file. Must run before importing app.*"""
+    directory = tempfile.mkdtemp(prefix="carbon-bench-")
+    path = os.path.join(directory, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    # A fixed key keeps the app from warning about a random per-process one
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    # Empty values win over a local .env, so the MySQL settings are ignored
+    for name in ("DB_HOST", "DB_USER", "DB_PASSWORD", "DB_NAME"):
+        os.environ[name] = ""
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    return path
+
+
+def percentile(sorted_values, q):
+    """Linear-interpolated percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def latency_summary(samples, unit_scale=1000.0, unit="ms"):
+    ordered = sorted(samples)
+    return {
+        f"p50_{unit}": round(percentile(ordered, 50) * unit_scale, 4),
+        f"p95_{unit}": round(percentile(ordered, 95) * unit_scale, 4),
+        f"p99_{unit}": round(percentile(ordered, 99) * unit_scale, 4),
+    }
+
+
+def time_calls(fn, iterations, repeat=5):
+    """Time fn() in batches; returns per-call seconds for each batch (fastest batches matter)."""
+    per_call = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        per_call.append((time.perf_counter() - started) / iterations)
+    return per_call
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def save_results(results, path):
+    with open(path, "w") as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def compare(results, baseline, threshold):
+    """Return a list of (benchmark, metric, baseline, current, change) regressions."""
+    regressions = []
+    for name, metrics in results["results"].items():
+        base_metrics = baseline.get("results", {}).get(name)
+        if not base_metrics:
+            continue
+        for metric, current in metrics.items():
+            base = base_metrics.get(metric)
+            if not isinstance(base, (int, float)) or not base:
+                continue
+            if metric.startswith(HIGHER_IS_BETTER):
+                change = (base - current) / base
+            elif metric.startswith(LOWER_IS_BETTER):
+                change = (current - base) / base
+            else:
+                continue
+            if change > threshold:
+                regressions.append((name, metric, base, current, change))
+    return regressions
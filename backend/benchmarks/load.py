@@ -0,0 +1,134 @@
+"""
+In-process HTTP load scenarios: requests go through the full ASGI stack
+(routing, validation, serialization, database) via httpx's ASGI transport,
+without opening sockets.
+"""
+
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+
+from .harness import latency_summary
+
+MODES = ("car", "bus", "train", "bike", "walk")
+DIETS = ("vegan", "vegetarian", "mixed", "nonveg")
+
+
+def _log_payload(rng, day):
+    return {
+        "date": day.isoformat(),
+        "travelKm": round(rng.uniform(0, 120), 1),
+        "travelMode": rng.choice(MODES),
+        "electricityKwh": round(rng.uniform(0, 30), 1),
+        "diet": rng.choice(DIETS),
+    }
+
+
+async def _drive(make_request, requests, concurrency):
+    """Issue `requests` calls with at most `concurrency` in flight; returns (latencies, wall seconds)."""
+    latencies = []
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            response = await make_request(i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{response.request.url} -> {response.status_code}: {response.text[:200]}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+
+def _summary(latencies, wall):
+    return {"rps": round(len(latencies) / wall, 1), **latency_summary(latencies)}
+
+
+async def _seed_logs(client, user_id, headers, rows, rng):
+    start = date(2020, 1, 1)
+    chunk = 5000
+    for offset in range(0, rows, chunk):
+        payload = [_log_payload(rng, start + timedelta(days=(offset + i) % 1825)) for i in range(min(chunk, rows - offset))]
+        response = await client.post(f"/logs/{user_id}/bulk", json=payload, headers=headers)
+        response.raise_for_status()
+
+
+async def run_scenarios(quick=False, list_sizes=(10, 1000, 100000), concurrency=8):
+    import httpx
+    from app.main import app
+
+    rng = random.Random(1234)
+    requests = 200 if quick else 2000
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    # ASGITransport does not send lifespan events; run startup (migrations) explicitly
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        run_id = f"{time.time_ns():x}"
+
+        async def register(i):
+            return await client.post("/register", json={
+                "email": f"bench-{run_id}-{i}@example.com",
+                "username": f"bench-{run_id}-{i}",
+                "password": "bench-password",
+            })
+        latencies, wall = await _drive(register, requests // 4, concurrency)
+        results["http.register"] = _summary(latencies, wall)
+
+        async def login(i):
+            return await client.post("/login", json={
+                "email": f"bench-{run_id}-{i}@example.com",
+                "password": "bench-password",
+            })
+        # Logs in as the users registered above; bcrypt runs off the event loop
+        latencies, wall = await _drive(login, requests // 4, concurrency)
+        results["http.login"] = _summary(latencies, wall)
+
+        async def signup(i):
+            user_id = (await register(i)).json()["id"]
+            token = (await login(i)).json()["access_token"]
+            return user_id, {"Authorization": f"Bearer {token}"}
+
+        payloads = [_log_payload(rng, date(2024, 1, 1)) for _ in range(64)]
+
+        async def compute(i):
+            return await client.post("/compute", json=payloads[i % len(payloads)])
+        latencies, wall = await _drive(compute, requests, concurrency)
+        results["http.compute"] = _summary(latencies, wall)
+
+        owner, owner_headers = await signup(requests)
+
+        async def create_log(i):
+            return await client.post(f"/logs/{owner}", json=payloads[i % len(payloads)], headers=owner_headers)
+        latencies, wall = await _drive(create_log, requests, concurrency)
+        results["http.create_log"] = _summary(latencies, wall)
+
+        # 100 what-if scenarios over five years of daily logs
+        user_id, headers = await signup(requests + 1)
+        await _seed_logs(client, user_id, headers, 1825, rng)
+        grid = {"grid": {"shiftKm": [0, 5, 10, 20, 40], "diet": [None, "vegetarian", "vegan", "mixed"], "electricityCutPercent": [0, 10, 20, 30, 50]}}
+
+        async def simulate(i, user_id=user_id, headers=headers):
+            return await client.post(f"/simulate/{user_id}", json=grid, headers=headers)
+        latencies, wall = await _drive(simulate, max(10, requests // 20), min(concurrency, 4))
+        results["http.simulate_100x5y"] = _summary(latencies, wall)
+
+        for size in list_sizes:
+            user_id, headers = await signup(requests + size + 1)
+            await _seed_logs(client, user_id, headers, size, rng)
+            # Keep the total rows transferred per scenario roughly constant
+            calls = max(5, min(requests, (requests * 200) // max(size, 1)))
+
+            async def list_logs(i, user_id=user_id, headers=headers):
+                return await client.get(f"/logs/{user_id}", headers=headers)
+            latencies, wall = await _drive(list_logs, calls, min(concurrency, calls))
+            metrics = _summary(latencies, wall)
+            metrics["rows_per_sec"] = round(calls * size / wall, 1)
+            results[f"http.list_logs_{size}"] = metrics
+    return results
+
+
+def run(quick=False, list_sizes=(10, 1000, 100000), concurrency=8):
+    return asyncio.run(run_scenarios(quick=quick, list_sizes=list_sizes, concurrency=concurrency))
@@ -0,0 +1,74 @@
+"""
+Micro-benchmarks for the pure emission calculations in app.logic / app.batch.
+"""
+
+import random
+
+from .harness import latency_summary, time_calls
+
+MODES = ("car", "bus", "train", "bike", "walk")
+DIETS = ("vegan", "vegetarian", "mixed", "nonveg")
+
+
+def _inputs(n, seed=42):
+    rng = random.Random(seed)
+    return [
+        (round(rng.uniform(0, 120), 1), rng.choice(MODES), round(rng.uniform(0, 30), 1), rng.choice(DIETS))
+        for _ in range(n)
+    ]
+
+
+def _per_call(name, fn, iterations, repeat):
+    samples = time_calls(fn, iterations, repeat)
+    best = min(samples)
+    return name, {"ops_per_sec": round(1.0 / best, 1), **latency_summary(samples, 1e6, "us")}
+
+
+def run(quick=False):
+    from app.batch import compute_batch
+    from app.logic import calculate_emissions, compute_eco_score, generate_tips
+    from app.schemas import ComputeRequest
+
+    iterations = 2000 if quick else 20000
+    repeat = 5 if quick else 9
+    inputs = _inputs(256)
+    results = {}
+
+    def emissions():
+        for km, mode, kwh, diet in inputs:
+            calculate_emissions(km, mode, kwh, diet)
+
+    def tips():
+        for km, mode, kwh, diet in inputs:
+            generate_tips(km, mode, kwh, diet, 12.0)
+
+    def full_compute():
+        for km, mode, kwh, diet in inputs:
+            _, _, _, total = calculate_emissions(km, mode, kwh, diet)
+            compute_eco_score(total)
+            generate_tips(km, mode, kwh, diet, total)
+
+    batch_iterations = max(1, iterations // len(inputs))
+    for name, fn in (
+        ("micro.calculate_emissions", emissions),
+        ("micro.generate_tips", tips),
+        ("micro.compute_scalar", full_compute),
+    ):
+        # Each call covers len(inputs) records; report per-record figures
+        name, metrics = _per_call(name, fn, batch_iterations, repeat)
+        metrics["ops_per_sec"] = round(metrics["ops_per_sec"] * len(inputs), 1)
+        for key in ("p50_us", "p95_us", "p99_us"):
+            metrics[key] = round(metrics[key] / len(inputs), 4)
+        results[name] = metrics
+
+    batch_size = 10000
+    items = [
+        ComputeRequest(date="2024-01-01", travelKm=km, travelMode=mode, electricityKwh=kwh, diet=diet)
+        for km, mode, kwh, diet in _inputs(batch_size, seed=7)
+    ]
+    samples = time_calls(lambda: compute_batch(items), 1, repeat)
+    results["micro.compute_batch_10k"] = {
+        "rows_per_sec": round(batch_size / min(samples), 1),
+        **latency_summary(samples),
+    }
+    return results
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for Carbon Footprint Tracker
+Runs micro-benchmarks, cold-start timings, in-process HTTP load scenarios
+and response serialization timings against a throwaway SQLite database, then compares the numbers with
+benchmarks/baseline.json.
+
+    python benchmarks/run.py                    # full run, compare to baseline
+    python benchmarks/run.py --quick            # smaller run for local iteration
+    python benchmarks/run.py --update-baseline  # store this run as the new baseline
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import (
+    BASELINE_PATH, compare, environment, load_baseline, save_results, use_offline_database,
+)
+
+
+def print_table(results):
+    columns = ("rps", "ops_per_sec", "rows_per_sec", "p50_ms", "p95_ms", "p99_ms", "p50_us", "p95_us", "p99_us")
+    width = max(len(name) for name in results) + 2
+    for name, metrics in sorted(results.items()):
+        cells = [f"{key}={metrics[key]:,}" for key in columns if key in metrics]
+        print(f"  {name:<{width}}" + "  ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations and smaller datasets")
+    parser.add_argument("--suite", choices=("all", "micro", "startup", "http", "serialize"), default="all")
+    parser.add_argument("--list-sizes", default=None, help="Comma separated log counts for list_logs (default 10,1000,100000)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent in-flight HTTP requests")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed regression as a fraction (default 0.25)")
+    parser.add_argument("--output", help="Write this run's results as JSON")
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with this run")
+    args = parser.parse_args()
+
+    database = use_offline_database()
+    print(f"Using offline SQLite database at {database}")
+
+    from benchmarks import load, micro, serialization, startup
+
+    if args.list_sizes:
+        list_sizes = tuple(int(size) for size in args.list_sizes.split(","))
+    else:
+        list_sizes = (10, 1000, 10000) if args.quick else (10, 1000, 100000)
+
+    started = time.perf_counter()
+    results = {}
+    if args.suite in ("all", "micro"):
+        print("Running micro-benchmarks...")
+        results.update(micro.run(quick=args.quick))
+    if args.suite in ("all", "startup"):
+        # Before the HTTP suite, so the database is still small
+        print("Running cold-start benchmark...")
+        results.update(startup.run(quick=args.quick))
+    if args.suite in ("all", "http"):
+        print("Running HTTP load scenarios...")
+        results.update(load.run(quick=args.quick, list_sizes=list_sizes, concurrency=args.concurrency))
+    if args.suite in ("all", "serialize"):
+        print("Timing response serialization...")
+        results.update(serialization.run(quick=args.quick))
+    run = {"environment": environment(), "quick": args.quick, "results": results}
+    print(f"\nResults ({time.perf_counter() - started:.1f}s):")
+    print_table(results)
+
+    if args.output:
+        save_results(run, args.output)
+    if args.update_baseline:
+        save_results(run, args.baseline)
+        print(f"\n✅ Baseline written to {args.baseline}")
+        return True
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print("\nNo baseline found; run with --update-baseline to create one.")
+        return True
+    if baseline.get("quick") != args.quick:
+        print("\n⚠️  Baseline was recorded with a different --quick setting; numbers are not comparable.")
+    regressions = compare(run, baseline, args.threshold)
+    if not regressions:
+        print(f"\n✅ No regressions beyond {args.threshold:.0%} of the baseline")
+        return True
+    print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+    for name, metric, base, current, change in regressions:
+        print(f"  {name} {metric}: {base:,} -> {current:,} ({change:+.0%} worse)")
+    return False
+
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
@@ -0,0 +1,94 @@
+"""
+Response serialization: times the orjson fast path (FAST_JSON) against
+FastAPI's validate-and-json.dumps path. That both send the same bytes is
+checked by tests/test_serialize.py.
+"""
+
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+
+from .harness import time_calls
+from .load import _log_payload
+
+
+def _encode_timings(rows, quick):
+    """Encoding cost alone: response_model validation + json.dumps vs orjson."""
+    from pydantic import TypeAdapter
+    from app.schemas import LogResponse
+    from app.serialize import fast_json_bytes, json_bytes
+
+    adapter = TypeAdapter(LogResponse)
+    content = {"items": rows, "nextCursor": None}
+    if json_bytes(adapter.dump_python(adapter.validate_python(content), mode="json")) != fast_json_bytes(content):
+        raise AssertionError("encoders disagree on the benchmark rows")
+    # The one intended difference: json.dumps rejects non-finite floats (a 500
+    # on the validated path), orjson writes them as null
+    odd = {"items": [dict(rows[0], travelKg=float("inf"), totalKg=float("nan"))], "nextCursor": None}
+    if b'"travelKg":null' not in fast_json_bytes(odd):
+        raise AssertionError("non-finite floats should encode as null")
+
+    def validated():
+        json_bytes(adapter.dump_python(adapter.validate_python(content), mode="json"))
+
+    def fast():
+        fast_json_bytes(content)
+
+    results = {}
+    iterations = 5 if quick else 20
+    for name, fn in (("validated", validated), ("fast", fast)):
+        best = min(time_calls(fn, iterations, repeat=3))
+        results[f"serialize.encode_{len(rows)}_{name}"] = {
+            "ops_per_sec": round(1 / best, 1),
+            "rows_per_sec": round(len(rows) / best, 1),
+        }
+    return results
+
+
+async def _signup(client, name):
+    user = {"email": f"{name}@example.com", "username": name, "password": "bench-password"}
+    user_id = (await client.post("/register", json=user)).json()["id"]
+    token = (await client.post("/login", json={"email": user["email"], "password": user["password"]})).json()["access_token"]
+    return user_id, {"Authorization": f"Bearer {token}"}
+
+
+async def run_scenarios(quick=False):
+    import httpx
+    from app import serialize
+    from app.main import app
+
+    rng = random.Random(99)
+    size = 1000 if quick else 10000
+    calls = 10 if quick else 50
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Timed on ordinary rows: one exponent-formatted float sends the whole
+        # response through json.dumps
+        user_id, headers = await _signup(client, f"serialize-{time.time_ns():x}")
+        start = date(2010, 1, 1)
+        payload = [_log_payload(rng, start + timedelta(days=i)) for i in range(size)]
+        (await client.post(f"/logs/{user_id}/bulk", json=payload, headers=headers)).raise_for_status()
+        rows = (await client.get(f"/logs/{user_id}", headers=headers)).json()["items"]
+        results.update(_encode_timings(rows, quick))
+
+        original = serialize.FAST_JSON
+        try:
+            for name, fast in (("validated", False), ("fast", True)):
+                serialize.FAST_JSON = fast
+                started = time.perf_counter()
+                for _ in range(calls):
+                    (await client.get(f"/logs/{user_id}", headers=headers)).raise_for_status()
+                wall = time.perf_counter() - started
+                results[f"serialize.list_logs_{len(rows)}_{name}"] = {
+                    "rps": round(calls / wall, 1),
+                    "rows_per_sec": round(calls * len(rows) / wall, 1),
+                }
+        finally:
+            serialize.FAST_JSON = original
+    return results
+
+
+def run(quick=False):
+    return asyncio.run(run_scenarios(quick=quick))
@@ -0,0 +1,75 @@
+"""
+Cold-start benchmark: each sample is a fresh interpreter that imports the
+app, runs its lifespan startup and serves its first requests, so lazy
+imports and startup work are measured the way a new container sees them.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from .harness import BACKEND_DIR, latency_summary
+
+USER = {"email": "startup-bench@example.com", "username": "startup-bench", "password": "bench-password"}
+COMPUTE = {"date": "2024-01-01", "travelKm": 12.5, "travelMode": "car", "electricityKwh": 8.0, "diet": "mixed"}
+
+
+def probe(setup=False):
+    """Runs in the child process; prints the phase timings (seconds) as JSON."""
+    started = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter()
+    import httpx
+
+    async def serve():
+        timings = {}
+        begin = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            timings["lifespan"] = time.perf_counter() - begin
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                if setup:
+                    await client.post("/register", json=USER)
+                    return timings
+                for name, request in (
+                    ("first_compute", lambda: client.post("/compute", json=COMPUTE)),
+                    ("first_login", lambda: client.post("/login", json={"email": USER["email"], "password": USER["password"]})),
+                ):
+                    begin = time.perf_counter()
+                    response = await request()
+                    timings[name] = time.perf_counter() - begin
+                    if response.status_code >= 400:
+                        raise RuntimeError(f"{name} -> {response.status_code}: {response.text[:200]}")
+        return timings
+
+    timings = asyncio.run(serve())
+    timings["import"] = imported - started
+    if not setup:
+        timings["ready"] = timings["import"] + timings["lifespan"] + timings["first_compute"]
+    print(json.dumps(timings))
+
+
+def _spawn(setup=False):
+    args = [sys.executable, "-m", "benchmarks.startup"] + (["--setup"] if setup else [])
+    started = time.perf_counter()
+    output = subprocess.run(args, cwd=BACKEND_DIR, env=os.environ.copy(), check=True, stdout=subprocess.PIPE, text=True).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["process"] = time.perf_counter() - started
+    return timings
+
+
+def run(quick=False):
+    # First boot creates the schema and the login user; later boots find it up to date
+    first = _spawn(setup=True)
+    results = {"startup.first_boot_lifespan": latency_summary([first["lifespan"]])}
+    samples = [_spawn() for _ in range(3 if quick else 10)]
+    for phase in ("import", "lifespan", "first_compute", "first_login", "ready", "process"):
+        results[f"startup.{phase}"] = latency_summary([s[phase] for s in samples])
+    return results
+
+
+if __name__ == "__main__":
+    probe(setup="--setup" in sys.argv)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Export the logs table to CSV, Parquet or Arrow IPC for analytics.
+Rows are streamed from a server-side cursor in batches and written
+incrementally, so memory stays flat however many rows are exported.
+"""
+
+import argparse
+import sys
+import os
+import time
+from datetime import date
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.export import EXPORT_BATCH_SIZE, EXPORT_COLUMNS, EXPORT_FORMATS, ExportWriter, export_query, parse_columns
+
+def main():
+    parser = argparse.ArgumentParser(description="Export logs in a columnar or CSV format")
+    parser.add_argument("output", help="File to write")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), help="Output format (default: from the file extension, else csv)")
+    parser.add_argument("--columns", help=f"Comma separated subset of: {', '.join(EXPORT_COLUMNS)}")
+    parser.add_argument("--user-id", type=int, help="Only export this user's logs")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="Only logs on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="Only logs on or before this date (YYYY-MM-DD)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Rows fetched and written per batch")
+    args = parser.parse_args()
+
+    format = args.format
+    if format is None:
+        extensions = {extension: name for name, (_, extension) in EXPORT_FORMATS.items()}
+        format = extensions.get(os.path.splitext(args.output)[1].lstrip(".").lower(), "csv")
+
+    db = SessionLocal()
+    try:
+        writer = ExportWriter(format, parse_columns(args.columns))
+        query = export_query(writer.columns, user_id=args.user_id, date_from=args.date_from, date_to=args.date_to)
+        print(f"Exporting logs to {args.output} ({format})...")
+        started = time.perf_counter()
+        exported = 0
+        result = db.execute(query.execution_options(stream_results=True, yield_per=args.batch_size))
+        with open(args.output, "wb") as fh:
+            for rows in result.partitions():
+                fh.write(writer.write(rows))
+                exported += len(rows)
+            fh.write(writer.close())
+        elapsed = time.perf_counter() - started
+        print(f"✅ Exported {exported} log(s) in {elapsed:.1f}s")
+    except Exception as e:
+        print(f"❌ Error exporting logs: {e}")
+        return False
+    finally:
+        db.close()
+
+    return True
+
+if __name__ == "__main__":
+    print("Carbon Footprint Tracker - Log Export")
+    print("=" * 50)
+
+    if not main():
+        sys.exit(1)
@@ -8,22 +8,25 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sqlalchemy import text
 from app.database import engine, Base
-from app.models import User, Log
+from app.migrations import migrate
 
 def create_tables():
-    """Create all tables in the database"""
+    """Create all tables and seed the default factor set via the migration runner"""
     try:
         print("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
+        applied = migrate(engine)
         print("✅ Database tables created successfully!")
-        print("Tables created:")
-        print("  - users")
-        print("  - logs")
+        print("Tables:")
+        for name in Base.metadata.tables:
+            print(f"  - {name}")
+        for message in applied:
+            print(f"  * {message}")
         
         # Test connection
         with engine.connect() as connection:
-            result = connection.execute("SELECT 1")
+            connection.execute(text("SELECT 1"))
             print("✅ Database connection test successful!")
             
     except Exception as e:
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Database migration script for Carbon Footprint Tracker
+Creates missing tables and upgrades existing ones to the current schema
+(e.g. converting logs.date to a DATE column with a (user_id, date) index).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from app.migrations import migrate
+
+def run_migrations():
+    """Apply all pending migrations"""
+    try:
+        print("Applying migrations...")
+        applied = migrate(engine)
+        if applied:
+            for message in applied:
+                print(f"  - {message}")
+        else:
+            print("  - schema already up to date")
+        print("✅ Migrations applied successfully!")
+    except Exception as e:
+        print(f"❌ Error applying migrations: {e}")
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    print("Carbon Footprint Tracker - Database Migration")
+    print("=" * 50)
+
+    if not run_migrations():
+        sys.exit(1)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Rebuild the quantile sketch behind /rank from the logs table.
+Run this after importing logs outside the API or if the ranking drifts.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.ranking import distribution
+
+def main():
+    db = SessionLocal()
+    try:
+        print("Rebuilding the daily footprint sketch...")
+        count = distribution.rebuild(db)
+        print(f"✅ Sketch rebuilt from {count} log(s)")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error rebuilding the sketch: {e}")
+        return False
+    finally:
+        db.close()
+
+    return True
+
+if __name__ == "__main__":
+    print("Carbon Footprint Tracker - Ranking Sketch Rebuild")
+    print("=" * 50)
+
+    if not main():
+        sys.exit(1)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Rebuild the per-user daily/weekly/monthly rollup tables from raw logs.
+Run this after importing logs outside the API or if the rollups drift.
+"""
+
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.rollups import rebuild_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute log rollups from the logs table")
+    parser.add_argument("--user-id", type=int, help="Only rebuild rollups for this user")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print("Rebuilding log rollups...")
+        users = rebuild_rollups(db, user_id=args.user_id)
+        print(f"✅ Rebuilt rollups for {users} user(s)")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error rebuilding rollups: {e}")
+        return False
+    finally:
+        db.close()
+
+    return True
+
+if __name__ == "__main__":
+    print("Carbon Footprint Tracker - Rollup Rebuild")
+    print("=" * 50)
+
+    if not main():
+        sys.exit(1)
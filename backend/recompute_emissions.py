@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Recompute stored log emissions with a versioned emission factor set.
+Works through the logs table in small chunks (one short transaction each),
+records progress in recompute_jobs and can resume an interrupted job.
+"""
+
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.factors import registry
+from app.recompute import RECOMPUTE_CHUNK_SIZE, run_recompute_job, start_recompute_job
+
+def print_progress(job):
+    percent = 100.0 * job.processed / job.total if job.total else 100.0
+    print(f"  job {job.id}: {job.processed}/{job.total} rows ({percent:.1f}%), {job.updated} changed, cursor at log {job.last_log_id}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute log emissions with a factor version")
+    parser.add_argument("--version", type=int, help="Factor version to apply (default: current)")
+    parser.add_argument("--resume", type=int, metavar="JOB_ID", help="Resume an existing recompute job")
+    parser.add_argument("--chunk-size", type=int, default=RECOMPUTE_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        if args.resume:
+            job_id = args.resume
+        else:
+            version = args.version or registry.current(db).version
+            job_id = start_recompute_job(db, version).id
+            print(f"Started recompute job {job_id} for factor version {version}")
+
+    job = run_recompute_job(job_id, chunk_size=args.chunk_size, on_progress=print_progress)
+    if job is None:
+        print(f"❌ Recompute job {job_id} not found")
+        return False
+    if job.status != "done":
+        print(f"❌ Recompute job {job.id} {job.status}: {job.error}")
+        print(f"Resume with: python recompute_emissions.py --resume {job.id}")
+        return False
+
+    print(f"✅ Recompute job {job.id} done: {job.processed} rows checked, {job.updated} changed")
+    return True
+
+if __name__ == "__main__":
+    print("Carbon Footprint Tracker - Emission Recompute")
+    print("=" * 50)
+
+    if not main():
+        sys.exit(1)
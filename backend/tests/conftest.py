@@ -0,0 +1,39 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+import httpx
+import pytest
+
+# Point the app at a throwaway database before anything imports it
+_tmp = tempfile.mkdtemp(prefix="carbon-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def signup(client, name):
+    """Register and log in a user; returns (user_id, auth headers)."""
+    user = {"email": f"{name}@example.com", "username": name, "password": "test-password"}
+    user_id = (await client.post("/register", json=user)).json()["id"]
+    token = (await client.post("/login", json={"email": user["email"], "password": user["password"]})).json()["access_token"]
+    return user_id, {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def run_app():
+    """Run `scenario(client)` against the app, lifespan included."""
+    from app.main import app
+
+    async def with_client(scenario):
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await scenario(client)
+
+    return lambda scenario: asyncio.run(with_client(scenario))
+
+
+@pytest.fixture
+def signup_user():
+    return signup
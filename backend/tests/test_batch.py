@@ -0,0 +1,71 @@
+"""The vectorized compute path against its scalar reference, on random inputs."""
+
+import random
+
+import numpy as np
+
+from app.batch import compute_batch, round2
+from app.logic import EMISSION_FACTORS, calculate_emissions, compute_eco_score, generate_tips
+from app.schemas import ComputeRequest
+
+MODES = ("car", "bus", "train", "bike", "walk", "scooter")
+DIETS = ("vegan", "vegetarian", "mixed", "nonveg", "keto")
+
+
+def _random_amounts(rng, n):
+    values = []
+    for _ in range(n):
+        kind = rng.randrange(5)
+        if kind == 0:
+            # Decimal ties such as 1.005, where the float sits just off .5
+            values.append(rng.randrange(-10**6, 10**6) / 1000 + 0.005)
+        elif kind == 1:
+            values.append(rng.uniform(-1e3, 1e3))
+        elif kind == 2:
+            values.append(rng.uniform(0, 1) * 10 ** rng.randrange(-8, 20))
+        elif kind == 3:
+            values.append(float(rng.randrange(-10**4, 10**4)) / 8)
+        else:
+            values.append(rng.choice((0.0, -0.0, 0.125, 2.675, 1e13, -1e13, 4503599627370495.5)))
+    return values
+
+
+def test_round2_matches_builtin_round():
+    rng = random.Random(11)
+    for _ in range(20):
+        values = _random_amounts(rng, 500)
+        expected = [round(v, 2) for v in values]
+        assert [repr(v) for v in round2(np.array(values)).tolist()] == [repr(v) for v in expected]
+
+
+def test_compute_batch_matches_scalar_path():
+    rng = random.Random(5)
+    factors = {
+        "travelPerKmKg": {mode: round(rng.uniform(0, 0.3), 4) for mode in ("car", "bus", "train", "bike", "walk")},
+        "electricityPerKwhKg": round(rng.uniform(0.1, 1), 3),
+        "foodPerDayKg": {diet: round(rng.uniform(1, 8), 2) for diet in ("vegan", "vegetarian", "mixed", "nonveg")},
+    }
+    for table in (EMISSION_FACTORS, factors):
+        items = [
+            ComputeRequest(
+                date="2024-01-01",
+                travelKm=abs(km),
+                travelMode=rng.choice(MODES),
+                electricityKwh=abs(kwh) % 1e4,
+                diet=rng.choice(DIETS),
+            )
+            for km, kwh in zip(_random_amounts(rng, 300), _random_amounts(rng, 300))
+        ]
+        for item, result in zip(items, compute_batch(items, table)):
+            travel_kg, electricity_kg, food_kg, total_kg = calculate_emissions(
+                item.travelKm, item.travelMode, item.electricityKwh, item.diet, table
+            )
+            expected = {
+                "travelKg": travel_kg,
+                "electricityKg": electricity_kg,
+                "foodKg": food_kg,
+                "totalKg": total_kg,
+                "ecoScore": compute_eco_score(total_kg),
+                "tips": generate_tips(item.travelKm, item.travelMode, item.electricityKwh, item.diet, total_kg),
+            }
+            assert repr(result) == repr(expected), item
@@ -0,0 +1,14 @@
+"""The /compute response cache."""
+
+from app.logic import calculate_emissions
+
+
+def test_cached_response_matches_signed_zero(run_app):
+    async def scenario(client):
+        for km in (-0.0, 0.0, -0.0):
+            payload = {"date": "2024-01-01", "travelKm": km, "travelMode": "car", "electricityKwh": 0.0, "diet": "mixed"}
+            body = (await client.post("/compute", json=payload)).json()
+            travel_kg = calculate_emissions(km, "car", 0.0, "mixed")[0]
+            assert repr(body["travelKg"]) == repr(travel_kg), (km, body)
+
+    run_app(scenario)
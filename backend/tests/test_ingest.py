@@ -0,0 +1,18 @@
+"""Bulk import parsing for each accepted content type."""
+
+
+def test_bulk_import_rejects_non_utf8_csv(run_app, signup_user):
+    async def scenario(client):
+        user_id, headers = await signup_user(client, "ingest-csv")
+        body = b"\xff\xfedate,travelKm,travelMode,electricityKwh,diet\n2024-01-01,1,car,1,mixed\n"
+        response = await client.post(f"/logs/{user_id}/bulk", content=body, headers={**headers, "Content-Type": "text/csv"})
+        assert response.status_code == 422, response.content
+        assert response.json()["detail"][0]["type"] == "csv_invalid"
+
+        # The same rows in UTF-8 (with a BOM) import cleanly
+        body = "﻿date,travelKm,travelMode,electricityKwh,diet\n2024-01-01,1,car,1,mixed\n".encode()
+        response = await client.post(f"/logs/{user_id}/bulk", content=body, headers={**headers, "Content-Type": "text/csv"})
+        assert response.status_code == 200, response.content
+        assert response.json()["inserted"] == 1
+
+    run_app(scenario)
@@ -0,0 +1,32 @@
+"""Per-request database metrics."""
+
+import re
+
+
+def _histogram(text, name, method, route):
+    """(count, sum) of a histogram series; the registry is shared, so tests compare deltas."""
+    labels = re.escape(f'method="{method}",route="{route}"')
+    count = re.search(rf"^{name}_count\{{{labels}\}} (\S+)$", text, re.M)
+    total = re.search(rf"^{name}_sum\{{{labels}\}} (\S+)$", text, re.M)
+    return (int(count.group(1)), float(total.group(1))) if count else (0, 0.0)
+
+
+def test_queued_writes_are_charged_to_their_request(run_app, signup_user):
+    async def scenario(client):
+        user_id, headers = await signup_user(client, "metrics")
+        before = (await client.get("/metrics")).text
+        base = _histogram(before, "http_request_db_queries", "POST", "/logs/{user_id}")
+        base_seconds = _histogram(before, "http_request_db_seconds", "POST", "/logs/{user_id}")[1]
+        payload = {"date": "2024-01-01", "travelKm": 5, "travelMode": "car", "electricityKwh": 2, "diet": "mixed"}
+        for _ in range(6):
+            assert (await client.post(f"/logs/{user_id}", json=payload, headers=headers)).status_code == 200
+
+        text = (await client.get("/metrics")).text
+        count, queries = _histogram(text, "http_request_db_queries", "POST", "/logs/{user_id}")
+        _, seconds = _histogram(text, "http_request_db_seconds", "POST", "/logs/{user_id}")
+        assert count - base[0] == 6
+        # The insert, the rollup upsert and the group COMMIT at the least
+        assert queries - base[1] >= 6 * 3, text
+        assert seconds > base_seconds
+
+    run_app(scenario)
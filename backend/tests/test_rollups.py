@@ -0,0 +1,90 @@
+"""Rollups must always equal a fresh aggregate of the raw logs."""
+
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.factors import registry
+from app.logic import EMISSION_FACTORS
+from app.models import Log, LogRollup, RecomputeJob
+from app.recompute import run_recompute_job, start_recompute_job
+from app.rollups import GRANULARITIES, period_start
+
+MODES = ("car", "bus", "train", "bike", "walk")
+DIETS = ("vegan", "vegetarian", "mixed", "nonveg")
+
+
+def _random_log(rng):
+    return {
+        "date": (date(2023, 11, 1) + timedelta(days=rng.randrange(120))).isoformat(),
+        "travelKm": round(rng.uniform(0, 80), 1),
+        "travelMode": rng.choice(MODES),
+        "electricityKwh": round(rng.uniform(0, 25), 1),
+        "diet": rng.choice(DIETS),
+    }
+
+
+def _assert_rollups_match_logs(user_id):
+    with SessionLocal() as db:
+        logs = db.execute(
+            select(Log.date, Log.travel_kg, Log.electricity_kg, Log.food_kg, Log.total_kg).where(Log.user_id == user_id)
+        ).all()
+        rollups = db.scalars(select(LogRollup).where(LogRollup.user_id == user_id)).all()
+    expected = defaultdict(lambda: [0.0, 0.0, 0.0, 0.0, 0])
+    for day, *amounts in logs:
+        for granularity in GRANULARITIES:
+            acc = expected[(granularity, period_start(day, granularity).isoformat())]
+            for i, amount in enumerate(amounts):
+                acc[i] += amount
+            acc[4] += 1
+    actual = {
+        (r.granularity, r.period): [r.travel_kg, r.electricity_kg, r.food_kg, r.total_kg, r.count]
+        for r in rollups if r.count
+    }
+    assert actual.keys() == expected.keys()
+    for key, sums in expected.items():
+        assert actual[key][4] == sums[4], key
+        assert actual[key][:4] == pytest.approx(sums[:4]), key
+
+
+def test_rollups_follow_creates_imports_and_recompute(run_app, signup_user):
+    rng = random.Random(19)
+
+    async def scenario(client):
+        user_id, headers = await signup_user(client, "rollups")
+        for _ in range(25):
+            response = await client.post(f"/logs/{user_id}", json=_random_log(rng), headers=headers)
+            assert response.status_code == 200
+        _assert_rollups_match_logs(user_id)
+
+        rows = [_random_log(rng) for _ in range(150)]
+        rows[7]["travelKm"] = "far"  # rejected rows must not reach the rollups
+        response = await client.post(f"/logs/{user_id}/bulk", json=rows, headers=headers)
+        assert response.json()["inserted"] == 149, response.content
+        _assert_rollups_match_logs(user_id)
+        return user_id
+
+    user_id = run_app(scenario)
+
+    factors = {
+        "travelPerKmKg": {mode: factor * 1.37 for mode, factor in EMISSION_FACTORS["travelPerKmKg"].items()},
+        "electricityPerKwhKg": EMISSION_FACTORS["electricityPerKwhKg"] / 3,
+        "foodPerDayKg": {diet: factor + 0.25 for diet, factor in EMISSION_FACTORS["foodPerDayKg"].items()},
+    }
+    with SessionLocal() as db:
+        version = registry.publish(db, factors).version
+        job_id = start_recompute_job(db, version).id
+    try:
+        run_recompute_job(job_id, chunk_size=16)
+        with SessionLocal() as db:
+            job = db.get(RecomputeJob, job_id)
+            assert job.status == "done" and job.total >= 174
+        _assert_rollups_match_logs(user_id)
+    finally:
+        # Later tests compute against the built-in factors
+        with SessionLocal() as db:
+            registry.publish(db, EMISSION_FACTORS)
@@ -0,0 +1,95 @@
+"""
+The orjson fast path (FAST_JSON) must send byte-for-byte the same responses
+as FastAPI's validate-and-json.dumps path. Each check drives the real
+endpoints twice, once per mode, with payloads chosen to hit float
+formatting and string escaping edge cases.
+"""
+
+import random
+from datetime import date, timedelta
+
+from app import serialize
+
+# Floats where orjson and repr() disagree (exponents, values below 1e-4),
+# integral values, signed zero and awkward strings
+EDGE_NUMBERS = (0, 3, -0.0, 0.1, 1e-05, 3.3e-05, 0.00012, 0.5e-4, 123456.789, 1e15, 1e16, 12345678901234567.0, 1e300)
+EDGE_STRINGS = ("car", "vélo 🚲", "tab\there", "quote\" back\\slash", "line\nbreak  ", "\x01\x1f\x7f", "</script>", "日本語")
+MODES = ("car", "bus", "train", "bike", "walk")
+DIETS = ("vegan", "vegetarian", "mixed", "nonveg")
+
+
+def _edge_payloads(rng):
+    payloads = []
+    for i, number in enumerate(EDGE_NUMBERS):
+        payloads.append({
+            "date": (date(2024, 1, 1) + timedelta(days=i)).isoformat(),
+            "travelKm": number,
+            "travelMode": EDGE_STRINGS[i % len(EDGE_STRINGS)],
+            "electricityKwh": EDGE_NUMBERS[-1 - i] if i % 2 else number,
+            "diet": EDGE_STRINGS[-1 - i % len(EDGE_STRINGS)],
+        })
+    for i in range(20):
+        payloads.append({
+            "date": (date(2023, 1, 1) + timedelta(days=i)).isoformat(),
+            "travelKm": round(rng.uniform(0, 120), 1),
+            "travelMode": rng.choice(MODES),
+            "electricityKwh": round(rng.uniform(0, 30), 1),
+            "diet": rng.choice(DIETS),
+        })
+    return payloads
+
+
+def _snapshot(response):
+    return (response.status_code, response.headers.get("content-type"), response.headers.get("etag"), response.content)
+
+
+async def _both_modes(request):
+    """Issue the same request with the fast path off and on."""
+    responses = []
+    for fast in (False, True):
+        serialize.FAST_JSON = fast
+        responses.append(_snapshot(await request()))
+    return responses
+
+
+def test_fast_path_matches_validated_responses(monkeypatch, run_app, signup_user):
+    monkeypatch.setattr(serialize, "FAST_JSON", serialize.FAST_JSON)
+
+    async def scenario(client):
+        user_id, headers = await signup_user(client, "serialize")
+        checks = []
+        for payload in _edge_payloads(random.Random(7)):
+            checks.append(("compute", lambda p=payload: client.post("/compute", json=p)))
+            checks.append(("create_log", lambda p=payload: client.post(f"/logs/{user_id}", json=p, headers=headers)))
+        for query in ("", "?limit=7", "?limit=7&after=3", "?limit=1000", "?from=2024-01-01&to=2024-01-10", "?from=2030-01-01"):
+            checks.append(("list_logs", lambda q=query: client.get(f"/logs/{user_id}{q}", headers=headers)))
+        for name, request in checks:
+            validated, fast = await _both_modes(request)
+            assert validated == fast, f"{name}: fast path differs"
+            assert validated[0] == 200, f"{name}: {validated!r}"
+
+        # NDJSON lines must match the JSON listing item for item
+        listing = (await client.get(f"/logs/{user_id}", headers=headers)).json()["items"]
+        lines = (await client.get(f"/logs/{user_id}?format=ndjson", headers=headers)).content.splitlines()
+        assert lines == [serialize.json_bytes(item) for item in listing]
+
+    run_app(scenario)
+
+
+def test_non_finite_amounts_are_rejected(run_app, signup_user):
+    async def scenario(client):
+        user_id, headers = await signup_user(client, "nonfinite")
+        # JSON has no literal for inf; 1e999 overflows to it when parsed
+        for value in (b"1e999", b"-1e999", b"NaN", b"1.5e300"):
+            body = b'{"date": "2024-01-01", "travelKm": %s, "travelMode": "car", "electricityKwh": 1, "diet": "mixed"}' % value
+            for path in ("/compute", f"/logs/{user_id}"):
+                response = await client.post(path, content=body, headers={**headers, "Content-Type": "application/json"})
+                assert response.status_code == 422, (path, value, response.content)
+
+        # Missing fields echo the whole object, inf included
+        body = b'{"date": "x", "travelKm": 1e999}'
+        for path, content in (("/compute", body), ("/compute/batch", b"[%s]" % body)):
+            response = await client.post(path, content=content, headers={"Content-Type": "application/json"})
+            assert response.status_code == 422, (path, response.content)
+
+    run_app(scenario)
@@ -0,0 +1,43 @@
+"""What-if simulation: input validation and chunked evaluation."""
+
+import random
+
+import pytest
+
+from app import simulate
+from app.logic import EMISSION_FACTORS
+from app.schemas import SimulationGrid, SimulationRequest
+
+MODES = ("car", "bus", "train", "bike", "walk")
+DIETS = ("vegan", "vegetarian", "mixed", "nonveg")
+
+
+@pytest.mark.parametrize("body", [
+    b'{"scenarios": [{"shiftKm": NaN}]}',
+    b'{"scenarios": [{"shiftKm": 1e999}]}',
+    b'{"scenarios": [{"electricityCutPercent": NaN}]}',
+    b'{"grid": {"shiftKm": [1, Infinity]}}',
+    b'{"grid": {"electricityCutPercent": [-Infinity]}}',
+])
+def test_non_finite_scenarios_are_rejected(run_app, signup_user, body):
+    async def scenario(client):
+        user_id, headers = await signup_user(client, f"simulate-{abs(hash(body))}")
+        response = await client.post(f"/simulate/{user_id}", content=body, headers={**headers, "Content-Type": "application/json"})
+        assert response.status_code == 422, response.content
+
+    run_app(scenario)
+
+
+def test_chunking_does_not_change_results(monkeypatch):
+    rng = random.Random(3)
+    rows = [
+        (rng.choice((None, round(rng.uniform(0, 80), 1))), rng.choice(MODES), round(rng.uniform(0, 25), 1), rng.choice(DIETS))
+        for _ in range(400)
+    ]
+    grid = SimulationGrid(fromMode="car", toMode="bus", shiftKm=[0, 2.5, 10, 50], diet=[None, "vegan"], electricityCutPercent=[0, 15, 100])
+    scenarios = simulate.expand_scenarios(SimulationRequest(grid=grid))
+
+    whole = simulate.simulate(rows, scenarios, EMISSION_FACTORS)
+    # Two scenarios per chunk, with a partial chunk at the end
+    monkeypatch.setattr(simulate, "SIMULATE_CHUNK_CELLS", 2 * len(rows) + 1)
+    assert simulate.simulate(rows, scenarios, EMISSION_FACTORS) == whole